@@ -1,48 +1,107 @@
+import io
 import os
+import time
 import numpy as np
 import pandas as pd
-import subprocess
 
-from flask import Flask, render_template, request
-from customer_churn_prediction import logger
-from customer_churn_prediction.pipeline.stage_06_prediction import PredictionPipeline
+from flask import Flask, Response, g, jsonify, render_template, request, stream_with_context
+from customer_churn_prediction import log_payload, logger
+from customer_churn_prediction.components.training_jobs import TrainingJobManager
+from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.pipeline.stage_06_prediction import (PredictionPipeline, get_prediction_cache,
+                                                                   get_predictor_registry)
+from customer_churn_prediction.utils import metrics
 
 
 app = Flask(__name__) # initialize the flask app
+training_jobs = TrainingJobManager(ConfigurationManager().get_training_jobs_config())
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # requests not matching any route are grouped, so unknown paths do not add label values
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    if "request_start" in g:
+        metrics.REQUEST_LATENCY.labels(route=route).observe(time.perf_counter() - g.request_start)
+    metrics.REQUESTS.labels(route=route, method=request.method, status=response.status_code).inc()
+    return response
+
+@app.route("/metrics", methods=['GET'])
+def metrics_page():
+    return Response(metrics.REGISTRY.render(), mimetype=metrics.CONTENT_TYPE)
+
+@app.route("/ready", methods=['GET'])
+def ready():
+    # readiness probe, passes once the prediction artifacts are loaded and checked
+    registry = get_predictor_registry()
+    if not registry.is_ready:
+        return jsonify({"ready": False, "message": "Prediction artifacts are not loaded yet"}), 503
+    return jsonify({"ready": True, **registry.get().versions})
+
+@app.route("/cache/stats", methods=['GET'])
+def cache_stats():
+    # hits, misses and evictions of the prediction cache of this worker process
+    cache = get_prediction_cache()
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
+
+def render(template, **context):
+    # rendering is measured as the last stage of the prediction
+    with metrics.STAGE_LATENCY.labels(stage="rendering").time():
+        return render_template(template, **context)
 
 @app.route("/", methods=['GET']) #route to display home page
 def homePage():
     return render_template("index.html")
 
-@app.route("/train", methods=['GET'])
+def wants_json():
+    return request.accept_mimetypes.best == 'application/json'
+
+@app.route("/train", methods=['GET', 'POST'])
 def train():
-    try:
-        result = subprocess.run(
-                    ["dvc", "repro", "model_trainer"],
-                    cwd=".",
-                    check=True, # If the command fails (returns non-zero), raise an exception immediately.
-                    capture_output=True, # Don’t print logs to terminal — give them to Python so I can control them.
-                    text=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-        )
-    except Exception as e:
-        msg = f"Training failed with error: {e}"
-        full_logs = result.stdout
-        logger.exception(f"Exception occured while training the model: {full_logs}")
-        return render_template(
-                    'message.html', 
-                    title="Traning failed",
-                    heading="Traning the model failed",
-                    message=msg,
-                    category="danger",
-                    icon="fas fa-times-circle",
-                    primary_action={"label": "Home", "url": "/"}
-                )
-    else:
-        full_logs = result.stdout
-        logger.exception(f"Model Training messages: {full_logs}")
+    # training runs in the background job executor, the job id is returned at once
+    job, is_new = training_jobs.submit()
+    status_url = f"/train/{job.job_id}"
+    if wants_json():
+        return jsonify({"job_id": job.job_id, "status": job.status, "status_url": status_url}), 202
+    return render_template(
+                'message.html',
+                title="Training started",
+                heading="Training started" if is_new else "Training is already queued",
+                message=f"Training job {job.job_id} is {job.status}, the model is trained in the background.",
+                category="info",
+                icon="fas fa-cogs",
+                primary_action={"label": "Training status", "url": status_url},
+                secondary_action={"label": "Home", "url": "/"}
+            ), 202
+
+@app.route("/train/<job_id>", methods=['GET'])
+def train_status(job_id):
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({"message": f"Training job {job_id} not found"}), 404
+    offset = request.args.get('offset', default=0, type=int)
+    if request.args.get('stream'):
+        # stream the logs as they are written until the job finishes
+        lines = (f"{line}\n" for line in job.follow_logs(offset))
+        return Response(stream_with_context(lines), mimetype='text/plain')
+    if job.status == "succeeded" and not wants_json() and 'offset' not in request.args:
         return render_template("training_message.html")
+    return jsonify(job.to_dict(offset))
+
+def with_versions(body, versions):
+    """
+    Attach the model and encoder version used for the prediction as response headers.
+    """
+    response = app.make_response(body)
+    for name in ('model_version', 'encoder_version'):
+        if name in versions:
+            response.headers[f"X-{name.replace('_', '-').title()}"] = versions[name]
+    return response
 
 @app.route("/predict",methods=['POST','GET'])
 def index():
@@ -89,19 +148,21 @@ def index():
                 'PaperlessBilling':PaperlessBilling,
             }
             data = pd.DataFrame([data])
-            logger.info(f"Data given to model: {[data,type(data)]}")
+            log_payload("Data given to model", data)
             obj = PredictionPipeline()
-            status, prediction, msg = obj.predict(data)
-            logger.info(f"Final prediction data: {[status, prediction, msg]}")
+            status, prediction, probability, msg, versions = obj.predict(data)
+            logger.debug("Final prediction data: %s", [status, prediction, probability, msg, versions])
             if status:
                 prediction = prediction[0]
                 if prediction:
                     msg = "Customer will going to leave the company."
                 else:
                     msg = "Customer will not going to leave the company."
-                return render_template('results.html', msg=str(msg))
+                churn_probability = None if probability is None else f"{probability[0]:.1%}"
+                return with_versions(render(
+                    'results.html', msg=str(msg), churn_probability=churn_probability, versions=versions), versions)
             else:
-                return render_template(
+                return with_versions(render(
                     'message.html', 
                     title="Something went wrong",
                     heading="Something went wrong",
@@ -109,7 +170,7 @@ def index():
                     category="danger",
                     icon="fas fa-times-circle",
                     primary_action={"label": "Home", "url": "/"}
-                )
+                ), versions)
             
         except Exception as e:
             logger.info(f"Final prediction data exception : {e}")
@@ -125,5 +186,63 @@ def index():
     else:
         return render_template('index.html')
 
+def read_batch_records():
+    """
+    Read the batch records from the request as CSV, JSON lines or JSON array of records.
+    """
+    if 'file' in request.files:
+        upload = request.files['file']
+        if upload.filename.endswith('.csv'):
+            return pd.read_csv(upload.stream)
+        return pd.read_json(upload.stream, lines=True, dtype=False)
+    if request.mimetype == 'text/csv':
+        return pd.read_csv(io.BytesIO(request.get_data()))
+    if request.mimetype == 'application/json':
+        payload = request.get_json()
+        records = payload.get('records', []) if isinstance(payload, dict) else payload
+        return pd.DataFrame.from_records(records)
+    return pd.read_json(io.BytesIO(request.get_data()), lines=True, dtype=False)
+
+@app.route("/predict/batch", methods=['POST'])
+def predict_batch():
+    try:
+        data = read_batch_records()
+    except Exception as e:
+        logger.info(f"Batch prediction request could not be parsed: {e}")
+        return jsonify({"status": False, "message": f"Records could not be parsed: {e}"}), 400
+
+    chunk_size = request.args.get('chunk_size', type=int)
+    if chunk_size is not None and chunk_size < 1:
+        return jsonify({"status": False, "message": f"chunk_size must be at least 1, got {chunk_size}"}), 400
+    # top_k returns only the k records with the highest churn probability, riskiest first
+    top_k = request.args.get('top_k', type=int)
+    obj = PredictionPipeline()
+    status, results, msg = obj.predict_batch(data, chunk_size, top_k)
+    if not status:
+        return jsonify({"status": False, "message": msg}), 500
+
+    is_valid = results['error'].isna()
+    selected = results[is_valid]
+    if top_k is not None:
+        selected = selected[selected['rank'].notna()].sort_values('rank')
+    with metrics.STAGE_LATENCY.labels(stage="rendering").time():
+        if request.args.get('format') == 'csv':
+            csv = (selected if top_k is not None else results).to_csv()
+            return with_versions(app.response_class(csv, mimetype='text/csv'), results.attrs)
+        records = selected.drop(columns=['error']).reset_index()
+        # a missing probability is sent as null, NaN is not valid JSON
+        records['churn_probability'] = records['churn_probability'].astype(object).where(
+            records['churn_probability'].notna(), None)
+        return with_versions(jsonify({
+            "status": True,
+            "message": msg,
+            "model_version": results.attrs['model_version'],
+            "encoder_version": results.attrs['encoder_version'],
+            "threshold": results.attrs['threshold'],
+            "results": records.to_dict(orient='records'),
+            "errors": results.loc[~is_valid, ['error']].reset_index().to_dict(orient='records'),
+        }), results.attrs)
+
 if __name__ == '__main__':
+    # development server, use python -m customer_churn_prediction.serving in production
     app.run(host='0.0.0.0', port=8080, debug=True)
@@ -0,0 +1,129 @@
+"""
+Shared helpers of the benchmarks, the benchmarks run in a separate workspace so the
+artifacts of the project are never touched.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_FILES = ["config/config.yaml", "params.yaml", "schema.yaml"]
+
+
+def load_schema() -> dict:
+    """
+    Return the schema of the project.
+    """
+    with open(REPO_ROOT / "schema.yaml") as f:
+        return yaml.safe_load(f)
+
+
+def synthetic_records(rows: int, seed: int = 27, with_target: bool = False) -> pd.DataFrame:
+    """
+    Generate the records of the Telco schema, the categories and the ranges are taken
+    from the CONSTRAINTS section of schema.yaml.
+    """
+    schema = load_schema()
+    constraints = schema.get("CONSTRAINTS", {})
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column, datatype in schema["COLUMNS"].items():
+        rule = constraints.get(column, {})
+        if "categories" in rule:
+            data[column] = rng.choice(np.array(rule["categories"], dtype=object), size=rows)
+        else:
+            low = rule.get("min", 0)
+            high = rule.get("max", low + 100)
+            values = rng.uniform(low, high, size=rows)
+            data[column] = values.round().astype(datatype) if datatype.startswith("int") else values.round(2)
+        if datatype.startswith("int"):
+            data[column] = data[column].astype(datatype)
+    if with_target:
+        data[schema["TARGET_COLUMN"]["name"]] = rng.choice(np.array(["No", "Yes"], dtype=object), size=rows, p=[0.73, 0.27])
+    return pd.DataFrame(data)
+
+
+def prepare_workspace(workdir: Path) -> Path:
+    """
+    Copy the configuration of the project into the workspace and move into it.
+    """
+    workdir = Path(workdir).resolve()
+    for name in PROJECT_FILES:
+        target = workdir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(REPO_ROOT / name, target)
+    os.chdir(workdir)
+    return workdir
+
+
+def set_config(updates: dict, path: Path = Path("config/config.yaml")):
+    """
+    Update the sections of the workspace config.yaml, keys are given as section.key.
+    """
+    with open(path) as f:
+        config = yaml.safe_load(f)
+    for key, value in updates.items():
+        section = config
+        *parents, name = key.split(".")
+        for parent in parents:
+            section = section[parent]
+        section[name] = value
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def latency_summary(timings) -> dict:
+    """
+    Return the percentiles of the timings in milliseconds.
+    """
+    timings = np.asarray(timings) * 1000
+    return {
+        "count": int(len(timings)),
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "max_ms": float(timings.max()),
+    }
+
+
+def environment_info() -> dict:
+    """
+    Return the environment of the run, so the results of different machines are not compared.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "git_commit": commit or None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save_results(results: dict, output: Path):
+    """
+    Save the benchmark results in json.
+    """
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Benchmark results saved at: {output}")
@@ -0,0 +1,133 @@
+"""
+Benchmark of the model artifact formats, the size of every format, how fast it loads and
+how fast it predicts one record.
+
+A random forest ( or xgboost ) is fitted on synthetic records and saved through the ModelStore
+in all the formats, every format is then loaded in a fresh interpreter with the libraries
+already imported, so the load time and the resident memory added by the model are measured alone.
+
+Usage:
+    python -m benchmarks.model_formats --trees 200 --max-depth 20
+    python -m benchmarks.model_formats --model xgboost --trees 300 --max-depth 6
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import (REPO_ROOT, environment_info, latency_summary, load_schema,
+                               prepare_workspace, save_results, synthetic_records)
+
+LOAD_CODE = """
+import json, sys, time
+from pathlib import Path
+import sklearn.ensemble, xgboost
+from customer_churn_prediction.components.model_store import ModelStore
+def rss_mb():
+    status = dict(line.split(":", 1) for line in open("/proc/self/status") if ":" in line)
+    return int(status["VmRSS"].split()[0]) / 1024
+start_rss, start = rss_mb(), time.perf_counter()
+model = ModelStore(Path(sys.argv[1])).load(sys.argv[2])
+load_s = time.perf_counter() - start
+print("LOAD " + json.dumps({"load_s": load_s, "rss_mb": rss_mb() - start_rss}))
+"""
+
+
+def fit_model(trees: int, max_depth: int, rows: int, kind: str = "random_forest"):
+    """
+    Fit the random forest or xgboost on the synthetic records encoded with their category codes.
+    """
+    schema = load_schema()
+    data = synthetic_records(rows, with_target=True)
+    for column, datatype in schema["COLUMNS"].items():
+        if datatype == "object":
+            data[column] = data[column].astype("category").cat.codes.astype("int64")
+    target = schema["TARGET_COLUMN"]["name"]
+    train_x, train_y = data[list(schema["COLUMNS"])], (data[target] == "Yes").astype("int64")
+    if kind == "xgboost":
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier(n_estimators=trees, max_depth=max_depth, random_state=27)
+    else:
+        from sklearn.ensemble import RandomForestClassifier
+
+        model = RandomForestClassifier(n_estimators=trees, max_depth=max_depth, random_state=27, n_jobs=-1)
+    return model.fit(train_x, train_y), train_x
+
+
+def one_record_latency(model, records, repeats: int = 200) -> dict:
+    """
+    Return the latency of predict_proba of one record, the way /predict calls the model.
+    """
+    timings = []
+    for position in range(repeats):
+        record = records.iloc[[position % len(records)]]
+        start = time.perf_counter()
+        model.predict_proba(record)
+        timings.append(time.perf_counter() - start)
+    return latency_summary(timings)
+
+
+def cold_load(model_path: Path, format_name: str, repeats: int) -> dict:
+    """
+    Load the model of the format in fresh interpreters and return the load time and memory.
+    """
+    runs = []
+    for _ in range(repeats):
+        process = subprocess.run(
+            [sys.executable, "-c", LOAD_CODE, str(model_path), format_name], capture_output=True, text=True)
+        lines = [line for line in process.stdout.splitlines() if line.startswith("LOAD ")]
+        if process.returncode != 0 or not lines:
+            raise RuntimeError(f"Loading the format {format_name} failed:\n{process.stderr[-2000:]}")
+        runs.append(json.loads(lines[-1].split(" ", 1)[1]))
+    return {
+        "load": latency_summary([run["load_s"] for run in runs]),
+        "rss_mb": max(run["rss_mb"] for run in runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=str(REPO_ROOT / "benchmarks" / "results" / "model_formats.json"))
+    parser.add_argument("--workdir", help="Workspace of the benchmark, a temporary directory by default")
+    parser.add_argument("--model", choices=["random_forest", "xgboost"], default="random_forest")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic records the model is fitted on")
+    parser.add_argument("--repeats", type=int, default=3, help="Cold loads measured per format")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve()
+    workdir = prepare_workspace(args.workdir or tempfile.mkdtemp(prefix="churn-model-formats-benchmark-"))
+    from customer_churn_prediction.components.model_store import FORMATS, ModelStore
+
+    model, train_x = fit_model(args.trees, args.max_depth, args.rows, args.model)
+    model_path = workdir / "model.joblib"
+    model_store = ModelStore(model_path)
+    manifest = model_store.save(model, list(FORMATS), train_x.iloc[:2000], args.repeats)
+
+    formats = {}
+    print(f"{'format':<14}{'size':>13}{'cold load':>15}{'memory':>14}{'one record p50':>18}")
+    for name, entry in manifest["formats"].items():
+        formats[name] = dict(entry)
+        if "error" not in entry:
+            formats[name]["cold"] = cold_load(model_path, name, args.repeats)
+            formats[name]["one_record"] = one_record_latency(model_store.load(name), train_x)
+            print(f"{name:<14}{entry['size_bytes'] / 1024 ** 2:>10.1f} MB"
+                  f"{formats[name]['cold']['load']['p50_ms']:>12.1f} ms{formats[name]['cold']['rss_mb']:>10.1f} MB rss"
+                  f"{formats[name]['one_record']['p50_ms']:>15.2f} ms")
+    save_results({
+        "benchmark": "model_formats",
+        "environment": environment_info(),
+        "settings": {"model": args.model, "trees": args.trees, "max_depth": args.max_depth, "rows": args.rows,
+                     "repeats": args.repeats, "workdir": str(workdir)},
+        "formats": formats,
+    }, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Benchmark of the serving path, the in-process PredictionPipeline and the Flask routes.
+
+Measures the cold start, the warm single record latency and the batch throughput on
+synthetic records generated from schema.yaml with a dummy model fitted on them.
+
+The same records are sent again and again, so the prediction cache is disabled in the
+workspace and the model path is measured, --prediction-cache measures the cached path,
+the results are labelled with it.
+
+Usage:
+    python -m benchmarks.serving --output benchmarks/results/serving.json
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+
+from benchmarks.common import (REPO_ROOT, environment_info, latency_summary, load_schema,
+                               prepare_workspace, save_results, set_config, synthetic_records)
+
+BATCH_SIZES = [1, 100, 10000]
+
+COLD_START_CODE = """
+import json, sys, time
+import pandas as pd
+record = pd.DataFrame([json.loads(sys.argv[1])])
+start = time.perf_counter()
+{import_code}
+imported = time.perf_counter()
+{predict_code}
+done = time.perf_counter()
+print("COLD_START " + json.dumps({{"import_s": imported - start, "first_prediction_s": done - imported}}))
+"""
+
+COLD_START_TARGETS = {
+    "in_process": (
+        "from customer_churn_prediction.pipeline.stage_06_prediction import PredictionPipeline",
+        "assert PredictionPipeline().predict(record)[0]",
+    ),
+    "flask": (
+        f"sys.path.insert(0, {str(REPO_ROOT)!r})\nimport app",
+        "assert app.app.test_client().post('/predict', data=record.iloc[0].astype(str).to_dict()).status_code == 200",
+    ),
+}
+
+
+def build_artifacts(model_name: str, rows: int = 5000):
+    """
+    Save the encoding table and a model fitted on the synthetic records in the workspace.
+    """
+    from customer_churn_prediction.components.encoding_table import EncodingTable
+    from customer_churn_prediction.config.configuration import ConfigurationManager
+
+    config = ConfigurationManager().get_prediction_config()
+    data = synthetic_records(rows, with_target=True)
+    categorical_columns = [column for column, datatype in config.schema.items() if datatype == "object"]
+    categorical_columns.append(config.target_column)
+    encoding_table = EncodingTable({column: sorted(data[column].unique()) for column in categorical_columns})
+    for path in (config.encoding_table_file, config.model_path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    encoding_table.save(config.encoding_table_file)
+
+    encoded_data, _ = encoding_table.transform(data)
+    data[encoded_data.columns] = encoded_data
+    train_x, train_y = data[list(config.schema)], data[config.target_column]
+    if model_name == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+
+        model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=27)
+    else:
+        from sklearn.dummy import DummyClassifier
+
+        model = DummyClassifier(strategy="prior")
+    joblib.dump(model.fit(train_x, train_y), config.model_path)
+
+
+def cold_start(repeats: int) -> dict:
+    """
+    Measure the import and the first prediction in a fresh interpreter.
+    """
+    record = synthetic_records(1).iloc[0].to_dict()
+    record = json.dumps({key: value.item() if hasattr(value, "item") else value for key, value in record.items()})
+    results = {}
+    for target, (import_code, predict_code) in COLD_START_TARGETS.items():
+        runs = []
+        for _ in range(repeats):
+            code = COLD_START_CODE.format(import_code=import_code, predict_code=predict_code)
+            process = subprocess.run([sys.executable, "-c", code, record], capture_output=True, text=True)
+            lines = [line for line in process.stdout.splitlines() if line.startswith("COLD_START ")]
+            if process.returncode != 0 or not lines:
+                raise RuntimeError(f"Cold start of {target} failed:\n{process.stderr[-2000:]}")
+            runs.append(json.loads(lines[-1].split(" ", 1)[1]))
+        results[target] = {
+            "import_s": min(run["import_s"] for run in runs),
+            "first_prediction_s": min(run["first_prediction_s"] for run in runs),
+            "repeats": repeats,
+        }
+    return results
+
+
+def warm_single_record(pipeline, client, iterations: int) -> dict:
+    """
+    Measure the latency of predicting one record after the artifacts are loaded.
+    """
+    records = synthetic_records(iterations, seed=1)
+    results = {}
+    timings = []
+    for position in range(iterations):
+        record = records.iloc[[position]]
+        start = time.perf_counter()
+        status = pipeline.predict(record)[0]
+        timings.append(time.perf_counter() - start)
+        assert status
+    results["in_process"] = latency_summary(timings)
+
+    timings = []
+    for position in range(iterations):
+        form = records.iloc[position].astype(str).to_dict()
+        start = time.perf_counter()
+        response = client.post("/predict", data=form)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    results["flask"] = latency_summary(timings)
+    return results
+
+
+def batch_throughput(pipeline, client, repeats: int) -> dict:
+    """
+    Measure the throughput of the batch prediction for every batch size.
+    """
+    results = {"in_process": {}, "flask": {}}
+    for batch_size in BATCH_SIZES:
+        records = synthetic_records(batch_size, seed=batch_size)
+        payload = json.loads(records.to_json(orient="records"))
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            status = pipeline.predict_batch(records)[0]
+            timings.append(time.perf_counter() - start)
+            assert status
+        results["in_process"][str(batch_size)] = throughput_summary(timings, batch_size)
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            response = client.post("/predict/batch", json=payload)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200
+        results["flask"][str(batch_size)] = throughput_summary(timings, batch_size)
+    return results
+
+
+def throughput_summary(timings, batch_size: int) -> dict:
+    """
+    Return the latency percentiles of the batch along with the records predicted per second.
+    """
+    summary = latency_summary(timings)
+    summary["records_per_s"] = batch_size / (summary["p50_ms"] / 1000)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=str(REPO_ROOT / "benchmarks" / "results" / "serving.json"))
+    parser.add_argument("--workdir", help="Workspace of the benchmark, a temporary directory by default")
+    parser.add_argument("--model", choices=["dummy", "random_forest"], default="dummy")
+    parser.add_argument("--iterations", type=int, default=200, help="Single record predictions measured")
+    parser.add_argument("--batch-repeats", type=int, default=5, help="Repeats of every batch size")
+    parser.add_argument("--cold-start-repeats", type=int, default=3)
+    parser.add_argument("--quiet", action="store_true", help="Log only the warnings while measuring")
+    parser.add_argument("--prediction-cache", action="store_true",
+                        help="Keep the prediction cache enabled, the repeated records are then served from the cache")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve()
+    workdir = prepare_workspace(args.workdir or tempfile.mkdtemp(prefix="churn-serving-benchmark-"))
+    set_config({"prediction_cache.enabled": args.prediction_cache})
+    build_artifacts(args.model)
+
+    sys.path.insert(0, str(REPO_ROOT))
+    import app
+    from customer_churn_prediction.pipeline.stage_06_prediction import PredictionPipeline
+
+    if args.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+    pipeline = PredictionPipeline()
+    client = app.app.test_client()
+    # load the artifacts before measuring the warm path
+    assert pipeline.predict(synthetic_records(1))[0]
+
+    results = {
+        "benchmark": "serving",
+        "environment": environment_info(),
+        "settings": {
+            "model": args.model,
+            "iterations": args.iterations,
+            "batch_repeats": args.batch_repeats,
+            "batch_sizes": BATCH_SIZES,
+            "quiet": args.quiet,
+            "prediction_cache": args.prediction_cache,
+            "workdir": str(workdir),
+            "schema_columns": len(load_schema()["COLUMNS"]),
+        },
+        "cold_start": cold_start(args.cold_start_repeats),
+        "warm_single_record": warm_single_record(pipeline, client, args.iterations),
+        "batch": batch_throughput(pipeline, client, args.batch_repeats),
+    }
+    save_results(results, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark of the memory the serving workers of one host use for the model.
+
+A master process forks the workers the way gunicorn does, then the proportional set size
+( PSS, the shared pages are split between the processes sharing them ) of the master and
+the workers is read from /proc. The workers either load the model themselves in one of
+the artifact formats, or use the model the master preloaded before forking.
+
+Usage:
+    python -m benchmarks.shared_memory --workers 4 --trees 200 --max-depth 20
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import REPO_ROOT, environment_info, prepare_workspace, save_results
+from benchmarks.model_formats import fit_model
+
+MASTER_CODE = """
+import gc, json, os, sys
+from pathlib import Path
+import numpy as np, pandas as pd, sklearn.ensemble
+from customer_churn_prediction.components.model_store import ModelStore
+path, format_name, workers, preload = sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4] == "1"
+def load():
+    model = ModelStore(Path(path)).load(format_name)
+    model.predict(pd.DataFrame(np.zeros((10, model.n_features_in_)), columns=model.feature_names_in_))
+    return model
+model = None
+if preload:
+    model = load()
+    gc.freeze()
+stop_read, stop_write = os.pipe()
+pids = []
+for _ in range(workers):
+    ready_read, ready_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        worker_model = model if preload else load()
+        worker_model.predict(pd.DataFrame(np.zeros((10, worker_model.n_features_in_)), columns=worker_model.feature_names_in_))
+        os.write(ready_write, b"1")
+        os.read(stop_read, 1)
+        os._exit(0)
+    os.read(ready_read, 1)
+    pids.append(pid)
+print("READY " + json.dumps(pids), flush=True)
+sys.stdin.readline()
+os.write(stop_write, b"x" * workers)
+for pid in pids:
+    os.waitpid(pid, 0)
+"""
+
+
+def memory_of(pid: int) -> dict:
+    """
+    Return the resident, proportional and private memory of the process in MB.
+    """
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        rollup = dict(line.split(":", 1) for line in f if ":" in line)
+    kilobytes = {key: int(rollup[key].split()[0]) for key in ("Rss", "Pss", "Private_Clean", "Private_Dirty")}
+    return {
+        "rss_mb": kilobytes["Rss"] / 1024,
+        "pss_mb": kilobytes["Pss"] / 1024,
+        "private_mb": (kilobytes["Private_Clean"] + kilobytes["Private_Dirty"]) / 1024,
+    }
+
+
+def measure(model_path: Path, format_name: str, workers: int, preload: bool) -> dict:
+    """
+    Fork the workers from a master and measure the memory of all of them while they are alive.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-c", MASTER_CODE, str(model_path), format_name, str(workers), "1" if preload else "0"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("READY "):
+            raise RuntimeError(f"Workers of the format {format_name} did not start")
+        pids = json.loads(line.split(" ", 1)[1])
+        master = memory_of(process.pid)
+        worker_memory = [memory_of(pid) for pid in pids]
+    finally:
+        process.stdin.write("\n")
+        process.stdin.close()
+        process.wait()
+    return {
+        "master": master,
+        "workers": worker_memory,
+        "total_pss_mb": master["pss_mb"] + sum(memory["pss_mb"] for memory in worker_memory),
+        "worker_private_mb": sum(memory["private_mb"] for memory in worker_memory) / len(worker_memory),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=str(REPO_ROOT / "benchmarks" / "results" / "shared_memory.json"))
+    parser.add_argument("--workdir", help="Workspace of the benchmark, a temporary directory by default")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--max-depth", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic records the model is fitted on")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve()
+    workdir = prepare_workspace(args.workdir or tempfile.mkdtemp(prefix="churn-shared-memory-benchmark-"))
+    from customer_churn_prediction.components.model_store import FORMATS, ModelStore
+
+    model, train_x = fit_model(args.trees, args.max_depth, args.rows)
+    model_path = workdir / "model.joblib"
+    manifest = ModelStore(model_path).save(model, list(FORMATS), train_x.iloc[:200], repeats=1)
+
+    runs = {"preloaded_joblib": measure(model_path, "joblib", args.workers, preload=True)}
+    for name, entry in manifest["formats"].items():
+        if "error" not in entry:
+            runs[name] = measure(model_path, name, args.workers, preload=False)
+    print(f"{'mode':<20}{'total pss':>14}{'private per worker':>22}")
+    for name, run in runs.items():
+        print(f"{name:<20}{run['total_pss_mb']:>11.1f} MB{run['worker_private_mb']:>19.1f} MB")
+    save_results({
+        "benchmark": "shared_memory",
+        "environment": environment_info(),
+        "settings": {"workers": args.workers, "trees": args.trees, "max_depth": args.max_depth,
+                     "rows": args.rows, "workdir": str(workdir)},
+        "formats": manifest["formats"],
+        "runs": runs,
+    }, output)
+
+
+if __name__ == "__main__":
+    main()
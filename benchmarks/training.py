@@ -0,0 +1,175 @@
+"""
+Benchmark of the training pipeline on the Telco dataset scaled synthetically.
+
+The dataset is replicated 10x, 100x and 1000x with jittered charges and unique customer
+ids, then `python main.py --profile --force` runs on every scale in its own workspace.
+The per step wall time, CPU time, peak memory and IO are collected in one report, so the
+steps that stop scaling linearly with the number of records stand out.
+
+Usage:
+    python -m benchmarks.training --source artifacts/data_ingestion/WA_Fn-UseC_-Telco-Customer-Churn.csv \
+        --config mlflow.tracking_uri_base=sqlite:///mlflow.db
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from benchmarks.common import (REPO_ROOT, environment_info, prepare_workspace, save_results,
+                               set_config, synthetic_records)
+
+TELCO_ROWS = 7043
+METRICS = ["wall_time_s", "cpu_time_s", "peak_memory_mb", "peak_rss_mb", "read_mb", "written_mb"]
+
+
+def load_source(source: str) -> pd.DataFrame:
+    """
+    Read the Telco dataset or generate the records of its size when it is not available.
+    """
+    if source and Path(source).exists():
+        return pd.read_csv(source)
+    print(f"Dataset: {source} not found, using {TELCO_ROWS} synthetic records")
+    data = synthetic_records(TELCO_ROWS, with_target=True)
+    data.insert(0, "customerID", [f"synthetic-{position}" for position in range(len(data))])
+    return data
+
+
+def write_scaled_dataset(data: pd.DataFrame, factor: int, path: Path, seed: int = 27):
+    """
+    Write the dataset replicated factor times, one replica at a time to bound the memory.
+
+    The charges of the replicas are jittered, so they are not removed as duplicates.
+    """
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for replica in range(factor):
+        part = data.copy()
+        if replica:
+            part["customerID"] = part["customerID"].astype(str) + f"-{replica}"
+            jitter = rng.uniform(-1, 1, size=len(part))
+            part["MonthlyCharges"] = (part["MonthlyCharges"] + jitter).clip(lower=0).round(2)
+        part.to_csv(path, mode="a" if replica else "w", header=not replica, index=False)
+    return len(data) * factor
+
+
+def run_scale(factor: int, data: pd.DataFrame, workdir: Path, config_overrides: dict, params_overrides: dict) -> dict:
+    """
+    Run the profiled training pipeline on the dataset scaled by the factor.
+    """
+    workspace = prepare_workspace(workdir / f"scale_{factor}")
+    set_config(config_overrides)
+    set_config(params_overrides, Path("params.yaml"))
+    with open("config/config.yaml") as f:
+        config = yaml.safe_load(f)
+    rows = write_scaled_dataset(data, factor, Path(config["data_ingestion"]["local_data_file"]))
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT / "src"), os.environ.get("PYTHONPATH")])))
+    process = subprocess.run(
+        [sys.executable, str(REPO_ROOT / "main.py"), "--profile", "--force"],
+        cwd=workspace, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Training of scale {factor}x failed:\n{process.stdout[-3000:]}\n{process.stderr[-3000:]}")
+    with open(workspace / config["profile_report_file"]) as f:
+        report = json.load(f)
+    return {"factor": factor, "rows": rows, "steps": report["steps"]}
+
+
+def summarize(scales: list) -> dict:
+    """
+    Aggregate the steps by their name for every scale, along with the time per record
+    relative to the smallest scale, 1.0 means the step scales linearly.
+    """
+    summary = {}
+    for scale in scales:
+        for step in scale["steps"]:
+            totals = summary.setdefault(step["step"], {}).setdefault(
+                str(scale["factor"]), {"calls": 0, "rows": scale["rows"], **{metric: 0.0 for metric in METRICS}})
+            totals["calls"] += 1
+            for metric in METRICS:
+                if metric.startswith("peak"):
+                    totals[metric] = max(totals[metric], step.get(metric) or 0.0)
+                else:
+                    totals[metric] += step.get(metric) or 0.0
+    for totals_by_scale in summary.values():
+        base = totals_by_scale[min(totals_by_scale, key=int)]
+        for totals in totals_by_scale.values():
+            base_time_per_row = base["wall_time_s"] / base["rows"]
+            time_per_row = totals["wall_time_s"] / totals["rows"]
+            totals["time_per_record_vs_base"] = round(time_per_row / base_time_per_row, 3) if base_time_per_row else None
+    return summary
+
+
+def print_summary(summary: dict, factors: list):
+    """
+    Print the wall time of every step for every scale.
+    """
+    header = f"{'step':<60}" + "".join(f"{str(factor) + 'x':>14}" for factor in factors)
+    print(header)
+    for name, totals_by_scale in summary.items():
+        cells = "".join(
+            f"{totals_by_scale[str(factor)]['wall_time_s']:>13.2f}s" if str(factor) in totals_by_scale else f"{'-':>14}"
+            for factor in factors
+        )
+        print(f"{name:<60}{cells}")
+
+
+def parse_overrides(values) -> dict:
+    """
+    Parse the section.key=value overrides, the values are parsed as yaml.
+    """
+    overrides = {}
+    for value in values or []:
+        key, _, raw = value.partition("=")
+        overrides[key] = yaml.safe_load(raw)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=str(REPO_ROOT / "artifacts/data_ingestion/WA_Fn-UseC_-Telco-Customer-Churn.csv"))
+    parser.add_argument("--scales", default="1,10,100,1000", help="Comma separated replication factors")
+    parser.add_argument("--output", default=str(REPO_ROOT / "benchmarks" / "results" / "training.json"))
+    parser.add_argument("--workdir", help="Workspace of the benchmark, a temporary directory by default")
+    parser.add_argument("--config", action="append", help="Override of config.yaml as section.key=value")
+    parser.add_argument("--params", action="append", help="Override of params.yaml as section.key=value")
+    args = parser.parse_args()
+
+    output = Path(args.output).resolve()
+    factors = [int(factor) for factor in args.scales.split(",")]
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="churn-training-benchmark-")).resolve()
+    data = load_source(args.source)
+    config_overrides, params_overrides = parse_overrides(args.config), parse_overrides(args.params)
+
+    scales = []
+    for factor in factors:
+        print(f"Training on the dataset scaled {factor}x")
+        scales.append(run_scale(factor, data, workdir, config_overrides, params_overrides))
+    summary = summarize(scales)
+    print_summary(summary, factors)
+    save_results({
+        "benchmark": "training",
+        "environment": environment_info(),
+        "settings": {
+            "source": args.source,
+            "source_rows": len(data),
+            "scales": factors,
+            "config_overrides": config_overrides,
+            "params_overrides": params_overrides,
+            "workdir": str(workdir),
+        },
+        "summary": summary,
+        "scales": scales,
+    }, output)
+
+
+if __name__ == "__main__":
+    main()
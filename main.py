@@ -1,75 +1,38 @@
+import argparse
+import time
+from pathlib import Path
+
 from customer_churn_prediction import logger
-from customer_churn_prediction.pipeline.stage_01_data_ingestion import (
-    DataIngestionPipeline
-)
-from customer_churn_prediction.pipeline.stage_02_data_validation import (
-    DataValidationPipeline
-)
-from customer_churn_prediction.pipeline.stage_03_data_transformation import (
-    DataTransformationPipeline
+from customer_churn_prediction.pipeline.pipeline_runner import PipelineRunner
+from customer_churn_prediction.utils.profiling import profiling, save_profile_report, track_step
+
+parser = argparse.ArgumentParser(description="Run all the training stages in a single process.")
+parser.add_argument(
+    "--force",
+    action="store_true",
+    help="Run every stage even if its inputs are unchanged since the last run"
 )
-from customer_churn_prediction.pipeline.stage_04_model_training import (
-    ModelTrainingPipeline
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Record the wall time, CPU time, peak memory and IO of every stage and step"
 )
-from customer_churn_prediction.pipeline.stage_05_model_evaluation import (
-    ModelEvaluationPipeline
-)
-
-STAGE_NAME = "Data Ingestion"
-
-try:
-    logger.info(f">>>>> Stage {STAGE_NAME} started <<<<<<")
-    data_ingestion = DataIngestionPipeline()
-    data_ingestion.main()
-    logger.info(f">>>>> Stage {STAGE_NAME} Completed <<<<<<")
-except Exception as e:
-    logger.exception(e)
-    raise
-
-
-STAGE_NAME = "Data Validation"
-
-try:
-    logger.info(f">>>>> Stage {STAGE_NAME} started <<<<<<")
-    data_validation = DataValidationPipeline()
-    data_validation.main()
-    logger.info(f">>>>> Stage {STAGE_NAME} Completed <<<<<<")
-except Exception as e:
-    logger.exception(e)
-    raise
-
-
-STAGE_NAME = "Data Transformation"
-
-try:
-    logger.info(f">>>>> Stage {STAGE_NAME} started <<<<<<")
-    data_validation = DataTransformationPipeline()
-    data_validation.main()
-    logger.info(f">>>>> Stage {STAGE_NAME} Completed <<<<<<")
-except Exception as e:
-    logger.exception(e)
-    raise
-
-
-STAGE_NAME = "Model Training and Selection"
-
-try:
-    logger.info(f">>>>> Stage {STAGE_NAME} started <<<<<<")
-    model_training = ModelTrainingPipeline()
-    model_training.main()
-    logger.info(f">>>>> Stage {STAGE_NAME} Completed <<<<<<")
-except Exception as e:
-    logger.exception(e)
-    raise
-
-
-STAGE_NAME = "Model Evaluation"
+args = parser.parse_args()
 
 try:
-    logger.info(f">>>>> Stage {STAGE_NAME} started <<<<<<")
-    model_evaluation = ModelEvaluationPipeline()
-    model_evaluation.main()
-    logger.info(f">>>>> Stage {STAGE_NAME} Completed <<<<<<")
+    runner = PipelineRunner(force=args.force)
+    if args.profile:
+        report = []
+        with profiling(report), track_step("Training Pipeline"):
+            runner.run()
+        save_profile_report(
+            Path(runner.config.config.profile_report_file),
+            report,
+            created_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            force=args.force,
+        )
+    else:
+        runner.run()
 except Exception as e:
     logger.exception(e)
     raise
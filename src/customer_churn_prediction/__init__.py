@@ -1,25 +1,164 @@
 """
 This module sets up logging for the Customer Churn Prediction project.
 Logs are saved to a file and also printed to the console.
+
+The callers only put the records on a queue, a background thread formats and writes
+them, so the request threads never wait for the file or the console. The level, the
+format (text or json) and the sampling of the request payloads are read from the
+logging section of config/config.yaml.
 """
 
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import random
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import yaml
+
+from customer_churn_prediction.constants import CONFIG_FILE_PATH
 
 FORMAT = "[%(asctime)s]:%(levelname)s:%(filename)s:%(message)s"
 LOG_DIR = "logs"
 LOG_FILEPATH = os.path.join(LOG_DIR,"running_logs.log")
 
-os.makedirs(LOG_DIR,exist_ok=True)
+DEFAULT_LOGGING_CONFIG = {
+    "level": "INFO",
+    "format": "text",
+    "file": LOG_FILEPATH,
+    "queue_size": 10000,
+    "payload_sample_rate": 0.0,
+    "levels": {},
+}
+
+# attributes every log record has, the other attributes are passed with extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format the records as one json object per line, the extra fields are kept as keys.
+    """
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Put the records on the queue of the background writer without formatting them.
+
+    The message is merged with its arguments so later changes of the arguments do not
+    leak into the log, the traceback is formatted by the writer thread. Records are
+    dropped and counted when the queue is full instead of blocking the caller.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def load_logging_config(path=CONFIG_FILE_PATH) -> dict:
+    """
+    Return the logging section of config.yaml merged over the defaults.
+    """
+    config = dict(DEFAULT_LOGGING_CONFIG)
+    try:
+        with open(path) as f:
+            config.update((yaml.safe_load(f) or {}).get("logging") or {})
+    except (OSError, yaml.YAMLError):
+        pass
+    return config
+
+
+def _start_listener():
+    """
+    Start the writer thread on a new queue, also used in the forked worker processes
+    where the thread of the parent does not exist.
+    """
+    global _listener
+    _handler.queue = queue.Queue(int(logging_config["queue_size"] or 0))
+    _listener = QueueListener(_handler.queue, *_writers, respect_handler_level=True)
+    _listener.start()
+
+
+def _after_fork():
+    _start_listener()
+    # the multiprocessing workers exit without running the atexit callbacks
+    from multiprocessing import util
+    util.Finalize(None, _stop_listener, exitpriority=0)
+
+
+def _stop_listener():
+    # flush the queued records before the process exits
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+logging_config = load_logging_config()
+os.makedirs(os.path.dirname(logging_config["file"]) or ".",exist_ok=True)
+
+_formatter = JsonFormatter() if logging_config["format"] == "json" else logging.Formatter(FORMAT)
+_writers = [logging.FileHandler(logging_config["file"]), logging.StreamHandler(sys.stdout)]
+for _writer in _writers:
+    _writer.setFormatter(_formatter)
+_handler = AsyncQueueHandler(None)
+_listener = None
+_start_listener()
+
+logging.basicConfig(level=logging_config["level"], handlers=[_handler])
+for _name, _level in (logging_config["levels"] or {}).items():
+    logging.getLogger(_name).setLevel(_level)
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+logger = logging.getLogger(__name__)
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=FORMAT,
-    handlers=[
-        logging.FileHandler(LOG_FILEPATH),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+def log_payload(message: str, payload):
+    """
+    Log the request payload for the sampled share of the requests, the payload_sample_rate
+    of the logging config. The payload is serialized only when the request is sampled.
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+    Params:
+        message (str): log message
+        payload: records of the request, a DataFrame or anything json serializable
+    """
+    rate = logging_config["payload_sample_rate"]
+    if not rate or not logger.isEnabledFor(logging.INFO) or random.random() >= rate:
+        return
+    if hasattr(payload, "to_dict"):
+        payload = payload.to_dict(orient="records")
+    logger.info(f"{message}: {json.dumps(payload, default=str)}", extra={"payload_sampled": True})
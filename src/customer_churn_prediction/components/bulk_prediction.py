@@ -0,0 +1,140 @@
+"""
+Bulk Prediction component scores CSV/Parquet files larger than the memory by reading,
+predicting and writing the records chunk by chunk.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.components.model_prediction import ModelPrediction
+from customer_churn_prediction.entity.config_entity import BulkPredictionConfig
+from customer_churn_prediction.utils.common import read_data_chunks
+
+
+class BulkPrediction:
+    """
+    Handles streaming prediction of large files.
+
+    Chunks are read in the calling thread and predicted by a bounded pool of workers,
+    so the next chunk is parsed while the previous ones are predicted. At most
+    max_workers + 1 chunks are held in the memory at a time.
+    """
+    def __init__(self, config: BulkPredictionConfig, model_prediction: ModelPrediction):
+        self.config = config
+        self.model_prediction = model_prediction
+
+    def read_chunks(self):
+        """
+        Read the input file chunk by chunk based on its extension.
+
+        Yields:
+            chunk (pd.DataFrame): Records of the input file
+        """
+        yield from read_data_chunks(Path(self.config.input_file), self.config.chunk_size)
+
+    def score_chunk(self, chunk: pd.DataFrame, offset: int) -> pd.DataFrame:
+        """
+        Predict the records of a chunk.
+
+        Params:
+            chunk (pd.DataFrame): Records to predict
+            offset (int): Position of the first record of the chunk in the input file
+
+        Returns:
+            results (pd.DataFrame): Per record prediction and validation errors
+        """
+        results = self.model_prediction.predict_batch(chunk)
+        results.index = results.index + offset
+        text_columns = [column for column in ("churn", "error") if column in results.columns]
+        results = results.astype({column: "string" for column in text_columns})
+        if self.config.id_column in chunk.columns:
+            results.insert(0, self.config.id_column, chunk[self.config.id_column].to_numpy())
+        return results
+
+    def predict(self):
+        """
+        Predict all the records of the input file and write the results incrementally.
+
+        Returns:
+            total_rows (int): Number of records predicted
+            invalid_rows (int): Number of records failed in validation
+        """
+        writer = ChunkWriter(self.config.output_file, self.config.output_format)
+        total_rows, invalid_rows, offset = 0, 0, 0
+        pending = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+                for chunk in self.read_chunks():
+                    pending.append(executor.submit(self.score_chunk, chunk, offset))
+                    offset += len(chunk)
+                    while len(pending) > self.config.max_workers:
+                        total_rows, invalid_rows = self._write(writer, pending.popleft(), total_rows, invalid_rows)
+                while pending:
+                    total_rows, invalid_rows = self._write(writer, pending.popleft(), total_rows, invalid_rows)
+        finally:
+            writer.close()
+        logger.info(
+            f"Bulk prediction of {total_rows} records done, {invalid_rows} records are invalid, "
+            f"predictions stored in {self.config.output_file}"
+        )
+        return total_rows, invalid_rows
+
+    def _write(self, writer, future, total_rows, invalid_rows):
+        """
+        Wait for the chunk prediction and write its results.
+        """
+        results = future.result()
+        writer.write(results)
+        total_rows += len(results)
+        invalid_rows += int(results["error"].notna().sum())
+        logger.info(f"Predicted {total_rows} records")
+        return total_rows, invalid_rows
+
+
+class ChunkWriter:
+    """
+    Writes the prediction chunks incrementally to a CSV or Parquet file.
+    """
+    def __init__(self, output_file, output_format: str):
+        if output_format not in ("csv", "parquet"):
+            raise ValueError(f"Output format: {output_format} is not supported, use csv or parquet")
+        self.output_file = output_file
+        self.output_format = output_format
+        self._parquet_writer = None
+        self._is_first_chunk = True
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    def write(self, results: pd.DataFrame):
+        """
+        Append the results to the output file.
+        """
+        if self.output_format == "csv":
+            results.to_csv(
+                self.output_file,
+                mode="w" if self._is_first_chunk else "a",
+                header=self._is_first_chunk
+            )
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(results, preserve_index=True)
+                self._parquet_writer = pq.ParquetWriter(self.output_file, table.schema)
+            else:
+                table = pa.Table.from_pandas(results, schema=self._parquet_writer.schema, preserve_index=True)
+            self._parquet_writer.write_table(table)
+        self._is_first_chunk = False
+
+    def close(self):
+        """
+        Close the output file.
+        """
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
@@ -3,15 +3,19 @@ Data Transformation component responsible for preprocessing and transforming raw
 into a suitable format for model training and evaluation.
 """
 
-import os
 import pickle
+from pathlib import Path
+
 import pandas as pd
 from imblearn.over_sampling import SMOTE
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 
 from customer_churn_prediction import logger
+from customer_churn_prediction.components.encoding_table import EncodingTable
 from customer_churn_prediction.entity.config_entity import DataTransformationConfig
+from customer_churn_prediction.utils.common import read_data, save_data, save_json
+from customer_churn_prediction.utils.profiling import profiled, profiling, track_step
 
 
 class DataTransformation:
@@ -21,7 +25,8 @@ class DataTransformation:
     def __init__(self, config: DataTransformationConfig):
         self.config = config
 
-    def filter_dataset(self):
+    @profiled
+    def filter_dataset(self, persist=True):
         """
         Filter the dataset columns based on the schema.
         """
@@ -30,19 +35,25 @@ class DataTransformation:
         relevant_columns.append(target_column)
         data = pd.read_csv(self.config.local_data_file)
         final_data = data[relevant_columns]
-        final_data.to_csv(self.config.filtered_data_file,index=False)
-        logger.info(f"Selected only relevant columns based on the schema and stored in {self.config.filtered_data_file}")
+        if persist:
+            save_data(final_data, self.config.filtered_data_file)
+            logger.info(f"Selected only relevant columns based on the schema and stored in {self.config.filtered_data_file}")
+        return final_data
 
-    def drop_duplicates(self):
+    @profiled
+    def drop_duplicates(self, data=None, persist=True):
         """
         Check for the duplicate values in the dataset and remove if exist.
         """
-        data = pd.read_csv(self.config.filtered_data_file)
+        if data is None:
+            data = read_data(self.config.filtered_data_file, self.config.memory_map)
         no_of_duplicates = data.duplicated().sum()
         if no_of_duplicates:
-            data.drop_duplicates(inplace=True)
+            data = data.drop_duplicates()
             logger.info(f"Remove the {no_of_duplicates} rows and final data stored in {self.config.filtered_data_file}")
-        data.to_csv(self.config.filtered_data_file,index=False)
+        if persist:
+            save_data(data, self.config.filtered_data_file)
+        return data
 
     def check_multicolinearity(self):
         """
@@ -50,12 +61,17 @@ class DataTransformation:
         """
         pass
 
-    def categorical_column_encoder(self,encoding):
+    @profiled
+    def categorical_column_encoder(self, encoding, data=None, persist=True):
         """
         Encode the categorical columns based on the encoding type.
+
+        The encoders and the encoding table are always saved, the encoded data only if persist is true.
         """
         try:
-            data = pd.read_csv(self.config.filtered_data_file)
+            if data is None:
+                data = read_data(self.config.filtered_data_file, self.config.memory_map)
+            data = data.copy()
             columns = self.config.schema.items()
             categorical_features = list(filter(lambda col: col[1] in ['str','object'],columns))
             logger.info(f"categorical_features {categorical_features}")
@@ -71,42 +87,53 @@ class DataTransformation:
                 label_encoder = LabelEncoder()
                 data[column] = label_encoder.fit_transform(data[column])
                 encoders[column] = label_encoder
-            data.to_csv(self.config.encoded_data_file,index=False)
+            if persist:
+                save_data(data, self.config.encoded_data_file)
             with open(self.config.encoder_file,'wb') as f:
                 pickle.dump(encoders,f)
+            EncodingTable.from_label_encoders(encoders).save(self.config.encoding_table_file)
         except Exception:
             logger.exception(f"Exception occured while encoding the categorical variables")
             raise
+        return data
         
-    def train_test_splitting(self):
+    @profiled
+    def train_test_splitting(self, data=None, persist=True):
         """
         Splits the preprocessed dataset into training and test sets 
-        and saves them as CSV files.
+        and saves them in the configured data format.
         """
-        data = pd.read_csv(self.config.encoded_data_file)
+        if data is None:
+            data = read_data(self.config.encoded_data_file, self.config.memory_map)
         train, test = train_test_split(
             data,
             test_size=self.config.params.test_size,
             random_state=self.config.params.random_state
         )
-        train.to_csv(os.path.join(self.config.root_dir,"train.csv"),index=False)
-        test.to_csv(os.path.join(self.config.root_dir,"test.csv"),index=False)
+        if persist:
+            save_data(train, self.config.train_data_file)
+            save_data(test, self.config.test_data_file)
         logger.info("Splitted data into training and test set")
         logger.info(f"training data shape: {train.shape}")
         logger.info(f"test data shape: {test.shape}")
+        return train, test
 
-    def handle_inbalanced_data(self):
+    @profiled
+    def handle_inbalanced_data(self, train_data=None, persist=True):
         """
         Handle class imbalance in the training dataset using SMOTE.
         """
-        train_data = pd.read_csv(os.path.join(self.config.root_dir,"train.csv"))
+        if train_data is None:
+            train_data = read_data(self.config.train_data_file, self.config.memory_map)
         x_train = train_data.drop(columns=[self.config.target_column.name])
         y_train = train_data[self.config.target_column.name]
         smote = SMOTE(random_state=23)
         x_train_res, y_train_res = smote.fit_resample(x_train,y_train)
         train_resampled = pd.concat([x_train_res,y_train_res],axis=1)
-        train_resampled.to_csv(os.path.join(self.config.root_dir,"train.csv"),index=False)
+        if persist:
+            save_data(train_resampled, self.config.train_data_file)
         logger.info("Applied SMOTE and saved resampled training data")
+        return train_resampled
 
     def is_inbalanced(self, y, threshould=0.7):
         """
@@ -116,14 +143,42 @@ class DataTransformation:
         minimum_class_ratio = class_counts.min()
         return minimum_class_ratio < threshould
     
-    def manage_inbalanced_data(self):
+    @profiled
+    def manage_inbalanced_data(self, train_data=None, persist=True):
         """
         Check for class imbalance in the training data and apply SMOTE if necessary.
         """
-        train_data = pd.read_csv(os.path.join(self.config.root_dir,"train.csv"))
+        if train_data is None:
+            train_data = read_data(self.config.train_data_file, self.config.memory_map)
         y_train = train_data[self.config.target_column.name]
         if self.is_inbalanced(y_train, self.config.params.data_transformation.smote_threshold):
-            self.handle_inbalanced_data()
+            train_data = self.handle_inbalanced_data(train_data, persist)
         else:
             logger.info("Data is already balanced")
-            
\ No newline at end of file
+        return train_data
+
+    def transform_in_memory(self, encoding='label_encoding'):
+        """
+        Run all the transformation steps on the in-memory dataset.
+
+        Only the final artifacts are saved: training set, test set, encoders and
+        the report of the resource usage of every step. The report traces the memory
+        with tracemalloc only under python main.py --profile or CHURN_PROFILE_DIR.
+
+        Returns:
+            train (pd.DataFrame): Training set after SMOTE
+            test (pd.DataFrame): Test set
+            report (list): Wall time, CPU time, memory and IO of every step
+        """
+        report = []
+        with profiling(report, trace_memory=False):
+            data = self.filter_dataset(persist=False)
+            data = self.drop_duplicates(data, persist=False)
+            data = self.categorical_column_encoder(encoding, data, persist=False)
+            train, test = self.train_test_splitting(data, persist=False)
+            train = self.manage_inbalanced_data(train, persist=False)
+            with track_step("save_data"):
+                save_data(train, self.config.train_data_file)
+                save_data(test, self.config.test_data_file)
+        save_json(Path(self.config.step_report_file), {"steps": report})
+        return train, test, report
@@ -2,10 +2,12 @@
 Data validation component for validating the columns and their data types based on schema.
 """
 
-import pandas as pd
+from pathlib import Path
 
 from customer_churn_prediction import logger
+from customer_churn_prediction.components.schema_validator import SchemaValidator
 from customer_churn_prediction.entity.config_entity import DataValidationConfig
+from customer_churn_prediction.utils.profiling import profiled
 
 class DataValidation:
     """
@@ -14,33 +16,31 @@ class DataValidation:
     def __init__(self, config: DataValidationConfig):
         self.config = config
 
+    @profiled
     def validate_all_columns(self):
         """
-        Validate the dataset columns based on the predefined schema.
+        Validate the dataset columns, data types and values based on the predefined schema.
+
+        The dataset is validated chunk by chunk, or only its header and first rows
+        when sample_rows is configured.
+
+        Returns:
+            result (ValidationResult): Validation result of the dataset
         """
         try:
-            data = pd.read_csv(self.config.local_data_file)
-            dataset_columns = data.dtypes.astype(str).to_dict()
-            all_schema = self.config.all_schema.items()
-            msg = ""
-            valiation_status = True
-            for column_name,datatype in all_schema:
-                if dataset_columns.get(column_name):
-                    valiation_status = True if valiation_status else False
-                    if dataset_columns.get(column_name) == datatype:
-                        valiation_status = True if valiation_status else False
-                        msg += f"{column_name} validated along with datatype"
-                    else:
-                        valiation_status = False
-                        msg += f"{column_name} validated without datatype"
-                else:
-                    valiation_status = False
-                    msg += f"{column_name} not validated"
-                msg += "\n"
+            validator = SchemaValidator(self.config.all_schema, self.config.constraints)
+            result = validator.validate_file(
+                Path(self.config.local_data_file),
+                chunk_size=self.config.chunk_size,
+                sample_rows=self.config.sample_rows
+            )
             with open(self.config.status_message_file,'w+') as f:
-                f.write(msg)
+                f.write(result.message + "\n")
             with open(self.config.status_file,'w+') as f:
-                f.write(f"Validation status: {valiation_status}")
+                f.write(f"Validation status: {result.status}")
+            logger.info(f"Data validation of {result.rows} rows done with status: {result.status}")
         except Exception:
             logger.exception(f"Exception occured while validating the columns")
             raise
+        else:
+            return result
@@ -0,0 +1,96 @@
+"""
+Decision engine component turns the churn probabilities into the churn decision by a
+threshold tuned on the test set and ranks the customers by their churn probability.
+"""
+
+import json
+
+import numpy as np
+
+from customer_churn_prediction import logger
+
+
+class DecisionEngine:
+    """
+    Vectorized churn decision and ranking based on the decision threshold.
+
+    A probability greater than or equal to the threshold is predicted as churn.
+    """
+    def __init__(self, threshold: float = 0.5, model_version: str = None):
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError(f"Decision threshold: {threshold} is not between 0 and 1")
+        self.threshold = float(threshold)
+        self.model_version = model_version
+
+    @classmethod
+    def tune(cls, actual, probability, beta: float = 1.0, model_version: str = None):
+        """
+        Find the threshold maximizing the F-beta score of the churn class.
+
+        Every distinct probability is evaluated as a threshold in a single sorted pass
+        over the records.
+
+        Params:
+            actual: Actual class of the records, 1 for churn
+            probability: Churn probability of the records
+            beta (float): Weight of the recall over the precision
+            model_version (str): Version of the model the threshold is tuned for
+
+        Returns:
+            engine (DecisionEngine): Engine with the tuned threshold
+            scores (dict): Threshold along with its F-beta score, precision and recall
+        """
+        actual = np.asarray(actual).ravel().astype(np.int64)
+        probability = np.asarray(probability, dtype=np.float64).ravel()
+        order = np.argsort(-probability, kind="mergesort")
+        probability, actual = probability[order], actual[order]
+        # the last record of every distinct probability, the records above it are predicted as churn
+        distinct = np.r_[np.flatnonzero(np.diff(probability)), len(probability) - 1]
+        true_positive = np.cumsum(actual)[distinct]
+        false_positive = (distinct + 1) - true_positive
+        false_negative = actual.sum() - true_positive
+        beta_square = beta ** 2
+        fbeta = (1 + beta_square) * true_positive / np.maximum(
+            (1 + beta_square) * true_positive + beta_square * false_negative + false_positive, 1)
+        best = int(np.argmax(fbeta))
+        engine = cls(probability[distinct[best]], model_version)
+        scores = {
+            "threshold": engine.threshold,
+            "beta": beta,
+            "fbeta": float(fbeta[best]),
+            "precision": float(true_positive[best] / (true_positive[best] + false_positive[best])),
+            "recall": float(true_positive[best] / max(actual.sum(), 1)),
+            "model_version": model_version,
+        }
+        logger.info(f"Decision threshold tuned: {scores}")
+        return engine, scores
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the decision threshold from the json file.
+        """
+        with open(path) as f:
+            content = json.load(f)
+        return cls(content["threshold"], content.get("model_version"))
+
+    def decide(self, probability) -> np.ndarray:
+        """
+        Return the churn decision of every probability, 1 for churn.
+        """
+        return (np.asarray(probability) >= self.threshold).astype(np.int64)
+
+    @staticmethod
+    def top_k(probability, k: int) -> np.ndarray:
+        """
+        Return the positions of the k highest probabilities ordered from the highest.
+
+        Missing probabilities are never ranked.
+        """
+        probability = np.asarray(probability, dtype=np.float64)
+        candidates = np.flatnonzero(~np.isnan(probability))
+        k = min(max(int(k), 0), len(candidates))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        top = candidates[np.argpartition(-probability[candidates], k - 1)[:k]]
+        return top[np.argsort(-probability[top], kind="mergesort")]
@@ -0,0 +1,132 @@
+"""
+Encoding table component stores the category to code maps of the categorical columns
+and applies them to the data without the per call validation of sklearn LabelEncoder.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from customer_churn_prediction import logger
+
+UNSEEN_CATEGORY_POLICIES = ("error", "fallback", "nan")
+
+
+class EncodingTable:
+    """
+    Versioned category to code maps of the categorical columns.
+
+    The category index of every column is built once, so encoding a batch is one
+    vectorized index lookup per column written into a single output matrix.
+    """
+    # version 1 stored every column as a map of the stringified categories to their code,
+    # version 2 stores the categories as a list ordered by their code
+    FORMAT_VERSION = 2
+    SUPPORTED_FORMAT_VERSIONS = (1, 2)
+
+    def __init__(self, columns: dict):
+        self.columns = {column: list(categories) for column, categories in columns.items()}
+        self._indexes = {column: pd.Index(categories, dtype=object) for column, categories in self.columns.items()}
+        self._categories = {
+            column: np.array(categories, dtype=object)
+            for column, categories in self.columns.items()
+        }
+        canonical = json.dumps(self.columns, sort_keys=True, default=str)
+        self.fingerprint = hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+    @classmethod
+    def from_label_encoders(cls, encoders: dict):
+        """
+        Build the encoding table from the fitted sklearn LabelEncoders.
+        """
+        return cls({column: encoder.classes_.tolist() for column, encoder in encoders.items()})
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the encoding table from the json file.
+        """
+        with open(path) as f:
+            content = json.load(f)
+        if content.get("format_version") not in cls.SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(
+                f"Encoding table: {path} has format version {content.get('format_version')}, "
+                f"expected one of {cls.SUPPORTED_FORMAT_VERSIONS}")
+        if content["format_version"] == 1:
+            return cls({
+                column: sorted(mapping, key=mapping.get)
+                for column, mapping in content["columns"].items()
+            })
+        return cls(content["columns"])
+
+    def save(self, path):
+        """
+        Save the encoding table as json, every column is stored as the list of its categories,
+        the position of a category is its code, so the numeric categories keep their type.
+        """
+        content = {
+            "format_version": self.FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "columns": self.columns
+        }
+        with open(path, "w") as f:
+            json.dump(content, f, indent=4)
+        logger.info(f"Encoding table {self.fingerprint} saved at: {path}")
+
+    def transform(self, data: pd.DataFrame, unseen: str = "error", fallback_code: int = -1):
+        """
+        Encode all the table columns present in the data.
+
+        Params:
+            data (pd.DataFrame): Data to encode
+            unseen (str): Policy for the categories not seen while training,
+                error: keep them flagged in the unseen mask,
+                fallback: encode them with the fallback code,
+                nan: encode them as NaN, only the models accepting missing values can
+                    predict them ( random forest, XGBoost ), the logistic regression can not
+            fallback_code (int): Code used by the fallback policy
+
+        Returns:
+            encoded_data (pd.DataFrame): Encoded columns
+            unseen_mask (pd.DataFrame): Whether the value was not seen while training,
+                only flagged for the error policy
+        """
+        if unseen not in UNSEEN_CATEGORY_POLICIES:
+            raise ValueError(f"Unseen category policy: {unseen} is not one of {UNSEEN_CATEGORY_POLICIES}")
+        columns = [column for column in self.columns if column in data.columns]
+        codes = np.empty((len(data), len(columns)), dtype=np.int64)
+        for position, column in enumerate(columns):
+            # the categories not in the index get -1
+            codes[:, position] = self._indexes[column].get_indexer(data[column])
+        unseen_mask = codes < 0
+        if unseen == "nan":
+            codes = codes.astype(np.float64)
+            codes[unseen_mask] = np.nan
+        elif unseen == "fallback":
+            codes[unseen_mask] = fallback_code
+        if unseen != "error":
+            unseen_mask = np.zeros_like(unseen_mask)
+        return (
+            pd.DataFrame(codes, index=data.index, columns=columns),
+            pd.DataFrame(unseen_mask, index=data.index, columns=columns)
+        )
+
+    def decode(self, column: str, codes) -> np.ndarray:
+        """
+        Return the categories of the codes of the column.
+
+        Raises:
+            ValueError: If a code is not the code of a category, like the fallback code -1
+        """
+        codes = np.asarray(codes)
+        categories = self._categories[column]
+        invalid = (codes < 0) | (codes >= len(categories))
+        if invalid.any():
+            raise ValueError(
+                f"Codes {np.unique(codes[invalid]).tolist()} are not codes of the categories of the column: {column}")
+        return categories.take(codes)
+
+    def __contains__(self, column):
+        return column in self.columns
@@ -0,0 +1,237 @@
+"""
+Flat forest component exports a trained random forest or XGBoost classifier into contiguous
+node arrays and predicts with a vectorized NumPy traversal, without the per call dispatch
+of sklearn and xgboost.
+
+The traversal repeats the arithmetic of the original library step by step, the export is
+served only when its probabilities are bit identical to the original model on the test set.
+"""
+
+import ctypes
+import ctypes.util
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def _load_libm():
+    try:
+        libm = ctypes.CDLL(ctypes.util.find_library("m"))
+        for name in ("expf", "logf"):
+            getattr(libm, name).restype = ctypes.c_float
+            getattr(libm, name).argtypes = [ctypes.c_float]
+        return libm
+    except (OSError, AttributeError, TypeError):
+        return None
+
+
+# xgboost computes the sigmoid with the expf and logf of the C library, numpy float32 rounds
+# them differently in the last bit, so they are called from the C library when it is found
+_LIBM = _load_libm()
+
+
+def _expf(values: np.ndarray) -> np.ndarray:
+    if _LIBM is None:
+        return np.exp(values.astype(np.float64)).astype(np.float32)
+    return np.fromiter((_LIBM.expf(value) for value in values.tolist()), dtype=np.float32, count=len(values))
+
+
+def _logf(value: np.float32) -> np.float32:
+    if _LIBM is None:
+        return np.float32(np.log(np.float64(value)))
+    return np.float32(_LIBM.logf(float(value)))
+
+
+class FlatForest:
+    """
+    Tree ensemble stored as one table of nodes, every tree is a range of the table.
+
+    The arrays are plain numpy arrays, so a joblib file of the flat forest can be memory
+    mapped and shared by the serving workers.
+
+    Params:
+        kind (str): random_forest or xgboost, the way the leaf values are combined
+        roots (np.ndarray): Node of the root of every tree
+        feature, threshold, left, right, default_left (np.ndarray): Split of every node,
+            the children of a leaf are the leaf itself
+        value (np.ndarray): Class probabilities ( random_forest ) or leaf value ( xgboost ) of every node
+        depth (int): Depth of the deepest tree
+        classes (np.ndarray): Classes of the model
+        n_features (int): Number of features of the model
+        feature_names (np.ndarray): Features of the model in their order, None if fitted without names
+        base_margin (np.float32): Margin every prediction starts with ( xgboost )
+    """
+    def __init__(self, kind, roots, feature, threshold, left, right, default_left, value, depth,
+                 classes, n_features, feature_names=None, base_margin=None):
+        self.kind = kind
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.depth = depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        if feature_names is not None:
+            self.feature_names_in_ = feature_names
+        self.base_margin = base_margin
+
+    @classmethod
+    def supports(cls, model) -> bool:
+        """
+        Whether the model can be exported, random forest and binary XGBoost classifiers with gbtree.
+        """
+        module = type(model).__module__
+        if type(model).__name__ == "RandomForestClassifier" and module.startswith("sklearn."):
+            return getattr(model, "n_outputs_", 1) == 1
+        if type(model).__name__ == "XGBClassifier" and module.startswith("xgboost"):
+            learner = json.loads(model.get_booster().save_raw(raw_format="json"))["learner"]
+            return learner["objective"]["name"] == "binary:logistic" and learner["gradient_booster"]["name"] == "gbtree"
+        return False
+
+    @classmethod
+    def from_model(cls, model) -> "FlatForest":
+        """
+        Export the trained model into the flat node arrays.
+
+        Raises:
+            TypeError: If the model is not a supported tree ensemble
+        """
+        if not cls.supports(model):
+            raise TypeError(f"Model {type(model).__name__} can not be exported as a flat forest")
+        if type(model).__name__ == "RandomForestClassifier":
+            return cls._from_random_forest(model)
+        return cls._from_xgboost(model)
+
+    @classmethod
+    def _from_random_forest(cls, model) -> "FlatForest":
+        trees, probabilities, default_left = [], [], []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            trees.append((tree.feature, tree.threshold, tree.children_left, tree.children_right, tree.max_depth))
+            # the trees of sklearn >= 1.3 send the missing values to the child of missing_go_to_left,
+            # the older trees compare them with the threshold, which sends them right
+            default_left.append(np.asarray(
+                getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool))
+            # the class probabilities of the leaves computed as DecisionTreeClassifier.predict_proba does
+            proba = tree.value[:, 0, :model.n_classes_]
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            probabilities.append(proba / normalizer)
+        return cls._build(
+            "random_forest", trees, np.concatenate(probabilities), np.concatenate(default_left), model,
+            threshold_dtype=np.float64, base_margin=None)
+
+    @classmethod
+    def _from_xgboost(cls, model) -> "FlatForest":
+        learner = json.loads(model.get_booster().save_raw(raw_format="json"))["learner"]
+        trees, leaf_values, default_left = [], [], []
+        for tree in learner["gradient_booster"]["model"]["trees"]:
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            split_conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            trees.append((
+                np.asarray(tree["split_indices"], dtype=np.int64),
+                split_conditions,
+                left,
+                np.asarray(tree["right_children"], dtype=np.int64),
+                cls._tree_depth(left, np.asarray(tree["right_children"], dtype=np.int64)),
+            ))
+            # the split condition of a leaf holds its value
+            leaf_values.append(np.where(left == -1, split_conditions, np.float32(0)))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        base_score = np.float32(learner["learner_model_param"]["base_score"].strip("[]"))
+        # the probability is turned into the margin the way xgboost does in float32
+        base_margin = -_logf(np.float32(1) / base_score - np.float32(1))
+        return cls._build(
+            "xgboost", trees, np.concatenate(leaf_values), np.concatenate(default_left), model,
+            threshold_dtype=np.float32, base_margin=np.float32(base_margin))
+
+    @staticmethod
+    def _tree_depth(left, right) -> int:
+        depth, level, nodes = 0, 0, np.array([0])
+        while len(nodes):
+            depth = level
+            children = np.concatenate([left[nodes], right[nodes]])
+            nodes, level = children[children != -1], level + 1
+        return depth
+
+    @classmethod
+    def _build(cls, kind, trees, value, default_left, model, threshold_dtype, base_margin) -> "FlatForest":
+        offsets = np.cumsum([0] + [len(feature) for feature, *_ in trees])
+        left = np.concatenate([
+            np.where(tree_left == -1, -1, tree_left + offset) for (_, _, tree_left, _, _), offset in zip(trees, offsets)])
+        right = np.concatenate([
+            np.where(tree_right == -1, -1, tree_right + offset) for (_, _, _, tree_right, _), offset in zip(trees, offsets)])
+        feature = np.concatenate([tree_feature for tree_feature, *_ in trees])
+        is_leaf = left == -1
+        feature_names = getattr(model, "feature_names_in_", None)
+        return cls(
+            kind=kind,
+            roots=offsets[:-1].astype(np.int64),
+            # the leaves point to themselves, so a finished path stays on its leaf
+            feature=np.where(is_leaf, 0, feature).astype(np.int64),
+            threshold=np.concatenate([tree_threshold for _, tree_threshold, *_ in trees]).astype(threshold_dtype),
+            left=np.where(is_leaf, np.arange(len(left)), left).astype(np.int64),
+            right=np.where(is_leaf, np.arange(len(right)), right).astype(np.int64),
+            default_left=np.where(is_leaf, True, default_left),
+            value=np.ascontiguousarray(value),
+            depth=int(max(depth for *_, depth in trees)),
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+            feature_names=None if feature_names is None else np.asarray(feature_names, dtype=object),
+            base_margin=base_margin,
+        )
+
+    def _features(self, data) -> np.ndarray:
+        if isinstance(data, pd.DataFrame) and hasattr(self, "feature_names_in_"):
+            data = data[list(self.feature_names_in_)]
+        data = np.asarray(data)
+        if data.ndim != 2 or data.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got data of shape {data.shape}")
+        # both libraries compare the features as float32
+        return data.astype(np.float32)
+
+    def apply(self, data) -> np.ndarray:
+        """
+        Return the leaf reached in every tree by every record, shape ( records, trees ).
+        """
+        data = self._features(data)
+        rows = np.arange(len(data))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(data), len(self.roots)))
+        for _ in range(self.depth):
+            values = data[rows, self.feature[nodes]]
+            if self.kind == "xgboost":
+                go_left = values < self.threshold[nodes]
+            else:
+                go_left = values <= self.threshold[nodes]
+            # the missing values follow the default direction of the split in both libraries
+            go_left = np.where(np.isnan(values), self.default_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, data) -> np.ndarray:
+        """
+        Return the class probabilities of the records, bit identical to the exported model.
+        """
+        leaves = self.apply(data)
+        if self.kind == "random_forest":
+            # the trees are summed in their order as the forest does, then averaged
+            probability = np.cumsum(self.value[leaves], axis=1)[:, -1]
+            return probability / len(self.roots)
+        margin = np.concatenate(
+            [np.full((len(leaves), 1), self.base_margin, dtype=np.float32), self.value[leaves]], axis=1)
+        margin = np.cumsum(margin, axis=1, dtype=np.float32)[:, -1]
+        positive = np.float32(1) / (np.float32(1) + _expf(-margin))
+        return np.column_stack([np.float32(1) - positive, positive])
+
+    def predict(self, data) -> np.ndarray:
+        """
+        Return the predicted class of the records.
+        """
+        probability = self.predict_proba(data)
+        if self.kind == "xgboost":
+            return self.classes_[(probability[:, 1] > 0.5).astype(np.int64)]
+        return self.classes_.take(np.argmax(probability, axis=1), axis=0)
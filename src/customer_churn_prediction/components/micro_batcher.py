@@ -0,0 +1,101 @@
+"""
+Micro batcher component coalesces the concurrent prediction requests of the process, so
+the records of several requests are encoded and predicted by the model in one call.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.components.model_prediction import ModelPrediction
+from customer_churn_prediction.components.prediction_cache import PredictionCache
+from customer_churn_prediction.components.predictor_registry import PredictorRegistry
+from customer_churn_prediction.entity.config_entity import ModelPredictionConfig
+from customer_churn_prediction.utils.metrics import MICRO_BATCH_RECORDS, MICRO_BATCH_WAIT
+
+
+class MicroBatcher:
+    """
+    Buffers the prediction requests and predicts them together on a background thread.
+
+    The first buffered request opens a batch, the batch is predicted once it holds
+    micro_batch_max_rows records or micro_batch_max_wait_ms passed since it was opened.
+    Every request gets the same result as ModelPrediction.predict, so a request waits
+    at most max_wait_ms longer while the model is called once for the whole batch.
+    """
+    def __init__(self, config: ModelPredictionConfig, registry: PredictorRegistry, cache: PredictionCache = None):
+        self.config = config
+        self.model_prediction = ModelPrediction(config, registry, cache)
+        self.max_wait_s = config.micro_batch_max_wait_ms / 1000
+        self.max_rows = config.micro_batch_max_rows
+        self._lock = threading.Lock()
+        self._requests = None
+        self._thread = None
+        self._pid = None
+
+    def predict(self, data: pd.DataFrame):
+        """
+        Predict the data along with the requests buffered at the same time.
+
+        Returns:
+            status, prediction, probability, msg, versions: Result of the request, as ModelPrediction.predict returns
+        """
+        if not self.config.micro_batching:
+            return self.model_prediction.predict(data)
+        future = Future()
+        self._start().put((data, future, time.perf_counter()))
+        return future.result()
+
+    def _start(self) -> queue.Queue:
+        """
+        Start the batching thread once per process, the thread of the master does not
+        survive the fork of the serving workers, so it is started by the first request.
+        """
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._requests = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._requests,), name="micro-batcher", daemon=True)
+                self._thread.start()
+            return self._requests
+
+    def _collect(self, requests: queue.Queue) -> list:
+        """
+        Wait for the first request, then collect the requests until the batch is full or the wait is over.
+        """
+        batch = [requests.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait_s
+        while rows < self.max_rows:
+            timeout = deadline - time.perf_counter()
+            try:
+                # the requests already buffered join the batch even once the wait is over
+                request = requests.get(timeout=timeout) if timeout > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            rows += len(request[0])
+        return batch
+
+    def _run(self, requests: queue.Queue):
+        while True:
+            batch = self._collect(requests)
+            started = time.perf_counter()
+            for _, _, buffered in batch:
+                MICRO_BATCH_WAIT.observe(started - buffered)
+            MICRO_BATCH_RECORDS.observe(sum(len(data) for data, _, _ in batch))
+            try:
+                results = self.model_prediction.predict_many([data for data, _, _ in batch])
+            except Exception as e:
+                logger.exception(f"Exception occured while predicting the micro batch of {len(batch)} requests")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
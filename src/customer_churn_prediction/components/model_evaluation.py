@@ -2,14 +2,15 @@
 Model Evaluation component evaluate the model based on the multiple evaluation metrics
 """
 
-import pandas as pd
 from pathlib import Path
-import joblib
 
 from sklearn.metrics import ( accuracy_score, auc, fbeta_score, precision_score, recall_score, roc_auc_score )
 
 from customer_churn_prediction import logger
-from customer_churn_prediction.utils.common import save_json
+from customer_churn_prediction.components.decision_engine import DecisionEngine
+from customer_churn_prediction.components.model_store import ModelStore
+from customer_churn_prediction.utils.common import get_file_hash, read_data, save_json
+from customer_churn_prediction.utils.profiling import profiled
 from customer_churn_prediction.entity.config_entity import ModelEvaluationConfig
 
 class ModelEvaluation:
@@ -35,22 +36,66 @@ class ModelEvaluation:
         logger.info(f"Metrics of the selected model is {[accuracy, precision, recall, fbeta, roc_auc]}")
         return accuracy, precision, recall, fbeta, roc_auc
     
-    def save_result(self):
+    @profiled
+    def save_result(self, model=None, test_data=None):
         """
         Save the Evaluation mertics at the specified path in json.
+
+        The metrics are computed from model.predict, the decisions at 0.5, and for the
+        models with probabilities also at the tuned threshold the served decisions use.
+
+        Params:
+            model: Selected model, loaded from the model path if not passed
+            test_data (pd.DataFrame): Test set, loaded from the test data path if not passed
         """
-        test_data = pd.read_csv(self.config.test_data_path)
-        model = joblib.load(self.config.model_path)
+        if test_data is None:
+            test_data = read_data(self.config.test_data_path, self.config.memory_map)
+        if model is None:
+            model = ModelStore(Path(self.config.model_path)).load()
         test_x = test_data.drop([self.config.target_column],axis=1)
         test_y = test_data[[self.config.target_column]]
         y_pred = model.predict(test_x)
-        accuracy, precision, recall, fbeta, roc_auc = self.eval_metrics(test_y, y_pred)
-        scores = {
+        scores = self.scores(test_y, y_pred)
+        if hasattr(model, "predict_proba"):
+            probability = model.predict_proba(test_x)[:, 1]
+            engine = self.tune_threshold(probability, test_y)
+            scores["tuned_threshold"] = {
+                "threshold": engine.threshold,
+                **self.scores(test_y, engine.decide(probability)),
+            }
+        save_json(path = Path(self.config.metric_file_name), data=scores)
+        logger.info(f"Evaluation metrics of the selected model are saved at the path {Path(self.config.metric_file_name)}")
+
+    def scores(self, actual, pred) -> dict:
+        """
+        Return the evaluation metrics of the predictions by their name.
+        """
+        accuracy, precision, recall, fbeta, roc_auc = self.eval_metrics(actual, pred)
+        return {
             'accuracy':accuracy,
-            'precision':precision, 
-            'recall': recall, 
-            'fbeta':fbeta, 
+            'precision':precision,
+            'recall': recall,
+            'fbeta':fbeta,
             'roc_auc':roc_auc
         }
-        save_json(path = Path(self.config.metric_file_name), data=scores)
-        logger.info(f"Evaluation metrics of the selected model are saved at the path {Path(self.config.metric_file_name)}")
+
+    @profiled
+    def tune_threshold(self, probability, test_y) -> DecisionEngine:
+        """
+        Tune the decision threshold of the churn probability on the test set and save it in json.
+
+        The threshold is saved along with the version of the model file, so it is
+        used only for the model it is tuned for.
+
+        Params:
+            probability (np.ndarray): Churn probability of the test set predicted by the selected model
+            test_y (pd.DataFrame): Target of the test set
+
+        Returns:
+            engine (DecisionEngine): Engine with the tuned threshold
+        """
+        model_version = get_file_hash(Path(self.config.model_path))[:12]
+        engine, scores = DecisionEngine.tune(test_y, probability, self.config.threshold_beta, model_version)
+        save_json(path = Path(self.config.decision_threshold_file), data=scores)
+        logger.info(f"Decision threshold of the selected model is saved at the path {Path(self.config.decision_threshold_file)}")
+        return engine
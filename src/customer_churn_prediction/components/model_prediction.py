@@ -3,66 +3,76 @@ Model Prediction component validate the passed data and apply all the preprocess
 Then predict the data based on the processed data
 """
 
+import threading
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-from pathlib import Path
-import pickle
-import joblib
 
 from customer_churn_prediction import logger
+from customer_churn_prediction.components.decision_engine import DecisionEngine
+from customer_churn_prediction.components.encoding_table import EncodingTable
+from customer_churn_prediction.components.prediction_cache import PredictionCache
+from customer_churn_prediction.components.predictor_registry import PredictorRegistry
+from customer_churn_prediction.components.schema_validator import ValidationResult
 from customer_churn_prediction.entity.config_entity import ModelPredictionConfig
+from customer_churn_prediction.utils.metrics import INVALID_RECORDS, PREDICTIONS, STAGE_LATENCY
+
+_audit_lock = threading.Lock()
 
 class ModelPrediction:
-    def __init__(self, config: ModelPredictionConfig):
+    def __init__(self, config: ModelPredictionConfig, registry: PredictorRegistry = None,
+                 cache: PredictionCache = None):
         self.config = config
+        self.registry = registry if registry is not None else PredictorRegistry(config)
+        self.validator = self.registry.validator
+        self.cache = cache
 
-    def validate_data(self,data: pd.DataFrame):
+    def validate_data(self, data: pd.DataFrame, check_values: bool = False) -> ValidationResult:
         """
         Validate the passed data columns on the specified schema.
 
+        The result is returned to the caller, the status file is written only when
+        the validation audit is enabled. The constrained values are not checked by
+        default, encode_batch checks them once per record while encoding.
+
         Params:
             data (pd.DataFrame): Data to validate the schema
-
-        Stores:
-            msg (str): Whether the passed data is validated along with data type specifed in schema
+            check_values (bool): Whether to compute the mask of the invalid constrained values as well
 
         Returns:
-            msg (str): Whether the passed data validated on schema or not
+            result (ValidationResult): Whether the passed data validated on schema along with the per column messages
+        """
+        with STAGE_LATENCY.labels(stage="validation").time():
+            result = self.validator.validate(data, check_values=check_values)
+        if not result.status:
+            logger.info(f"Model Prediction stage data validation: \n {result.message}")
+        if self.config.audit_validation_status:
+            self.audit_validation(result)
+        return result
+
+    def audit_validation(self, result: ValidationResult):
+        """
+        Append the validation status to the status file.
         """
         try:
-            data_columns = data.dtypes.astype(str).to_dict()
-            schema = self.config.schema
-            msg = ""
-            valiation_status = True
-            for column_name,datatype in schema.items():
-                if data_columns.get(column_name):
-                    valiation_status = True if valiation_status else False
-                    if data_columns.get(column_name) == datatype:
-                        valiation_status = True if valiation_status else False
-                        msg += f"{column_name} validated along with datatype"
-                    else:
-                        valiation_status = False
-                        msg += f"{column_name} validated without datatype"
-                else:
-                    valiation_status = False
-                    msg += f"{column_name} not validated"
-                msg += "\n"
-            with open(self.config.status_file,'w+') as f:
-                f.write(f"Validation status: {valiation_status}")
-            logger.info(f"Model Prediction stage data validation: \n {msg}")
+            with _audit_lock, open(self.config.status_file, 'a') as f:
+                f.write(f"{datetime.now().isoformat()} Validation status: {result.status}\n")
         except Exception:
-            logger.exception(f"Exception occured while validating the columns")
-            return "Something went wrong"
-        else:
-            return msg
+            logger.exception(f"Exception occured while writing the validation status")
 
-    def pre_process_data(self, data: pd.DataFrame):
+    def pre_process_data(self, data: pd.DataFrame, encoding_table: EncodingTable = None,
+                         validation: ValidationResult = None):
         """
         Check whether the passed data is validated based on the specified schema.
 
-        If the data is validated then transform the data by the encoders applied while training the data.
+        If the data is validated then transform the data by the encoding table created while training the data.
+        Data types of the columns are not required to match, values are converted and reported while encoding.
 
         Params:
             data (pd.DataFrame): Data to validate the schema
+            encoding_table (EncodingTable): Encoding table created while training, loaded from the registry if not passed
+            validation (ValidationResult): Validation result of the data, validated if not passed
 
         Returns:
             msg (str): Whether data is processed or not.
@@ -70,32 +80,31 @@ class ModelPrediction:
             relevant_data (pd.DataFrame): Relevant data after transformation based on the schema.
         """
         msg, is_data_processed, relevant_data = '', False, pd.DataFrame()
-        
-        status = False
-        with open(self.config.status_file,'r+') as f:
-            status_file_data = f.read()
-            if status_file_data:
-                status = status_file_data.rsplit(" ",1)
-        if status:
-            with open(self.config.encoder_file,"rb") as f:
-                encoders = pickle.load(f)
-                for col, encoder in encoders.items():
-                    if col in data.columns:
-                        data[col] = encoder.transform(data[col])
-            relevant_data = data[list(self.config.schema.keys())]
-            msg = "Data processed successfully"
-            is_data_processed = True
+
+        if validation is None:
+            validation = self.validate_data(data)
+        if not validation.missing_columns:
+            if encoding_table is None:
+                encoding_table = self.registry.get().encoding_table
+            encoded_data, errors = self.encode_batch(data, encoding_table)
+            if (errors == "").all():
+                relevant_data = encoded_data
+                msg = "Data processed successfully"
+                is_data_processed = True
+            else:
+                msg = "; ".join(errors[errors != ""])
         else:
-            msg = "Data columns are not validated"
+            msg = f"Data columns are not validated, missing columns: {', '.join(validation.missing_columns)}"
             is_data_processed = False
-        return msg, is_data_processed, relevant_data 
+        return msg, is_data_processed, relevant_data
 
     def predict(self, data: pd.DataFrame):
         """
         Check whether data is validated based on the schema.
         Preprocess the passed data as applied while training the model
 
-        Predict wherther the customer will churn or not
+        Predict wherther the customer will churn or not, the churn probability is
+        compared with the decision threshold when the model supports the probability.
 
         Params:
             data (pd.DataFrame): Data used to predict the churn.
@@ -103,20 +112,212 @@ class ModelPrediction:
         Returns:
             status (bool): Whether prediction is successfull.
             prediction (class) : Whether customer will churn or not or None
+            probability (np.ndarray): Churn probability or None
             msg (str): Data preprocessing message
+            versions (dict): Model and encoder version used for the prediction
         """
-        status, prediction, msg = False, None, ''          
-        validation_msg = self.validate_data(data)
-        processing_msg, is_data_processed, relevant_data = self.pre_process_data(data)
-        if is_data_processed:
-            model_path = Path(self.config.model_path)
-            if model_path:
-                model = joblib.load(Path(self.config.model_path))
-                prediction = model.predict(relevant_data)
-                status = True
+        return self.predict_many([data])[0]
+
+    def predict_many(self, requests: list) -> list:
+        """
+        Predict the records of several requests with one encoding pass and one model call.
+
+        Every request is validated on its own, a request with an invalid record fails
+        alone and the other requests are still predicted.
+
+        Params:
+            requests (list): Data of every request, pd.DataFrame
+
+        Returns:
+            results (list): (status, prediction, probability, msg, versions) of every request, as predict returns
+        """
+        try:
+            artifacts = self.registry.get()
+        except FileNotFoundError as e:
+            return [(False, None, None, str(e), {}) for _ in requests]
+        versions = artifacts.versions
+        results = [None] * len(requests)
+        accepted = []
+        for position, data in enumerate(requests):
+            validation = self.validate_data(data)
+            if validation.missing_columns:
+                INVALID_RECORDS.inc(len(data))
+                results[position] = (
+                    False, None, None,
+                    f"Data columns are not validated, missing columns: {', '.join(validation.missing_columns)}", versions)
             else:
-                msg = "Model is not exist yet train the model first"
+                accepted.append(position)
+        if not accepted:
+            return results
+
+        data = pd.concat([requests[position] for position in accepted], ignore_index=True)
+        encoded_data, errors = self.encode_batch(data, artifacts.encoding_table)
+        errors = errors.to_numpy()
+        bounds = np.cumsum([0] + [len(requests[position]) for position in accepted])
+        is_valid = [(errors[start:end] == "").all() for start, end in zip(bounds[:-1], bounds[1:])]
+        valid_rows = np.concatenate(
+            [np.arange(start, end) for start, end, valid in zip(bounds[:-1], bounds[1:], is_valid) if valid] + [[]]
+        ).astype(np.int64)
+        if len(valid_rows):
+            prediction, probability = self.decide(artifacts, encoded_data.iloc[valid_rows], use_cache=True)
+            self.count_predictions(artifacts, prediction)
+
+        offset = 0
+        for position, start, end, valid in zip(accepted, bounds[:-1], bounds[1:], is_valid):
+            if valid:
+                rows = slice(offset, offset + end - start)
+                offset += end - start
+                results[position] = (
+                    True, prediction[rows], None if probability is None else probability[rows], '', versions)
+            else:
+                INVALID_RECORDS.inc(int(end - start))
+                request_errors = errors[start:end]
+                results[position] = (False, None, None, "; ".join(request_errors[request_errors != ""]), versions)
+        return results
+
+    def decide(self, artifacts, relevant_data: pd.DataFrame, use_cache: bool = False):
+        """
+        Predict the churn of the encoded records by the decision threshold.
+
+        With use_cache only the records not predicted recently are passed to the model,
+        the cache is used by the single record requests and the small batches.
+
+        Returns:
+            prediction (np.ndarray): Whether customer will churn or not
+            probability (np.ndarray): Churn probability or None if the model does not support it
+        """
+        def infer(records):
+            with STAGE_LATENCY.labels(stage="inference").time():
+                if not has_probability:
+                    return model.predict(records)
+                return model.predict_proba(records)[:, 1]
+
+        model = artifacts.model
+        has_probability = hasattr(model, "predict_proba")
+        if self.cache is None or not use_cache:
+            output = infer(relevant_data)
         else:
-            msg = processing_msg
-        return status, prediction, msg
-            
\ No newline at end of file
+            output = self.cache.lookup(relevant_data, artifacts.versions, infer)
+        if not has_probability:
+            return output, None
+        return artifacts.decision_engine.decide(output), output
+
+    def count_predictions(self, artifacts, prediction):
+        """
+        Count the predicted records by their predicted class.
+        """
+        classes, counts = np.unique(np.asarray(prediction), return_counts=True)
+        if self.config.target_column in artifacts.encoding_table:
+            classes = artifacts.encoding_table.decode(self.config.target_column, classes.astype(np.int64))
+        for predicted_class, count in zip(classes, counts):
+            PREDICTIONS.labels(prediction=predicted_class).inc(int(count))
+
+    def encode_batch(self, data: pd.DataFrame, encoding_table: EncodingTable):
+        """
+        Validate and encode every schema column of the records in one vectorized pass.
+
+        Categories not seen while training are handled by the unseen category policy
+        of the config, with the error policy those records are reported as invalid.
+
+        Params:
+            data (pd.DataFrame): Records to validate and encode
+            encoding_table (EncodingTable): Encoding table created while training the model
+
+        Returns:
+            encoded_data (pd.DataFrame): Encoded schema columns of all the records
+            errors (pd.Series): Validation errors of each record, empty string if record is valid
+        """
+        with STAGE_LATENCY.labels(stage="encoding").time():
+            return self._encode_batch(data, encoding_table)
+
+    def _encode_batch(self, data: pd.DataFrame, encoding_table: EncodingTable):
+        errors = pd.Series("", index=data.index, dtype=object)
+        categorical_data, unseen_mask = encoding_table.transform(
+            data,
+            unseen=self.config.unseen_category_policy,
+            fallback_code=self.config.unseen_fallback_code
+        )
+        encoded_data = {}
+        for column, datatype in self.config.schema.items():
+            if column not in data.columns:
+                errors += f"{column} is missing; "
+                encoded_data[column] = np.zeros(len(data), dtype=np.int64)
+                continue
+            values = data[column]
+            if column in encoding_table:
+                invalid = unseen_mask[column]
+                encoded_data[column] = categorical_data[column].to_numpy()
+            else:
+                numeric = pd.to_numeric(values, errors="coerce")
+                invalid = numeric.isna()
+                if datatype.startswith("int"):
+                    invalid |= (numeric % 1) != 0
+                invalid |= self.validator.invalid_values(column, numeric)
+                encoded_data[column] = numeric.where(~invalid, 0).astype(datatype).to_numpy()
+            if invalid.any():
+                invalid_values = values[invalid].astype(object).where(values[invalid].notna(), "missing")
+                errors[invalid] = errors[invalid] + f"{column} has invalid value " + invalid_values.astype(str) + "; "
+        encoded_data = pd.DataFrame(encoded_data, index=data.index)
+        return encoded_data, errors.str.rstrip("; ")
+
+    def predict_batch(self, data: pd.DataFrame, chunk_size: int = None, top_k: int = None):
+        """
+        Validate, encode and predict the churn of all the passed records.
+
+        Records are encoded in one vectorized pass and the model is called once per chunk.
+
+        Params:
+            data (pd.DataFrame): Records used to predict the churn.
+            chunk_size (int): Number of records passed to the model at a time.
+            top_k (int): Rank the k records with the highest churn probability.
+
+        Returns:
+            results (pd.DataFrame): Prediction, churn label, churn probability and
+                validation error of each record, indexed by the record position.
+                With top_k the rank column holds 1 for the riskiest record.
+
+        Raises:
+            ValueError: If the chunk size is not a positive number of records
+        """
+        chunk_size = self.config.batch_chunk_size if chunk_size is None else chunk_size
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be at least 1 record, got {chunk_size}")
+        artifacts = self.registry.get()
+        data = data.reset_index(drop=True)
+        # large batches would pay a key per record and evict the records of the single record requests
+        use_cache = self.cache is not None and len(data) <= self.cache.config.max_batch_records
+        encoded_data, errors = self.encode_batch(data, artifacts.encoding_table)
+
+        prediction = np.zeros(len(data), dtype=np.int64)
+        probability = np.full(len(data), np.nan)
+        valid_rows = np.flatnonzero((errors == "").to_numpy())
+        for start in range(0, len(valid_rows), chunk_size):
+            rows = valid_rows[start:start + chunk_size]
+            chunk_prediction, chunk_probability = self.decide(artifacts, encoded_data.iloc[rows], use_cache)
+            prediction[rows] = chunk_prediction
+            if chunk_probability is not None:
+                probability[rows] = chunk_probability
+
+        is_valid = np.zeros(len(data), dtype=bool)
+        is_valid[valid_rows] = True
+        self.count_predictions(artifacts, prediction[valid_rows])
+        INVALID_RECORDS.inc(len(data) - len(valid_rows))
+        results = pd.DataFrame({
+            "prediction": pd.array(prediction, dtype="Int64"),
+            "churn_probability": probability,
+            "error": errors.where(~is_valid, None),
+        })
+        results.loc[~is_valid, "prediction"] = pd.NA
+        if self.config.target_column in artifacts.encoding_table:
+            labels = artifacts.encoding_table.decode(self.config.target_column, prediction)
+            results.insert(1, "churn", np.where(is_valid, labels, None))
+        if top_k is not None:
+            ranked_rows = DecisionEngine.top_k(probability, top_k)
+            rank = pd.array(np.full(len(data), pd.NA), dtype="Int64")
+            rank[ranked_rows] = np.arange(1, len(ranked_rows) + 1)
+            results["rank"] = rank
+        results.index.name = "row"
+        results.attrs.update(artifacts.versions)
+        results.attrs["threshold"] = artifacts.decision_engine.threshold
+        logger.info(f"Batch prediction done for {len(data)} records, {len(valid_rows)} valid")
+        return results
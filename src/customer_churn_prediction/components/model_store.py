@@ -0,0 +1,304 @@
+"""
+Model store component saves the trained model in several artifact formats, measures how
+fast every format loads and picks the format the serving loads the model from.
+"""
+
+import json
+import mmap
+import os
+import time
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import joblib
+import numpy as np
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.components.flat_forest import FlatForest
+from customer_churn_prediction.utils.common import get_file_hash, get_size
+
+# types the skops files of the trained models hold beyond the types skops trusts itself,
+# any other type is refused on load, a prefix would also let builtins.exec and alike through
+TRUSTED_TYPES = frozenset({
+    "sklearn.tree._tree.Tree",
+    "xgboost.core.Booster",
+    "xgboost.sklearn.XGBClassifier",
+})
+# share of the model file which must stay memory mapped for the format to count as shared
+MIN_SHARED_FRACTION = 0.5
+
+
+def _load_joblib_mmap(path: Path):
+    return joblib.load(path, mmap_mode="r")
+
+
+def _dump_joblib_zlib(model, path: Path):
+    joblib.dump(model, path, compress=("zlib", 3))
+
+
+def _dump_flat_forest(model, path: Path):
+    joblib.dump(FlatForest.from_model(model), path)
+
+
+def _dump_skops(model, path: Path):
+    import skops.io as sio
+
+    sio.dump(model, path)
+
+
+def _load_skops(path: Path):
+    import skops.io as sio
+
+    untrusted_types = sio.get_untrusted_types(file=path)
+    refused = [name for name in untrusted_types if name not in TRUSTED_TYPES]
+    if refused:
+        raise ValueError(f"Model file: {path} holds types which are not trusted: {refused}")
+    return sio.load(path, trusted=untrusted_types)
+
+
+def _is_mapped(array: np.ndarray) -> bool:
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def mapped_bytes(model) -> int:
+    """
+    Return the bytes of the numpy arrays of the loaded model which are still memory mapped
+    from the file, the processes mapping the same file share these pages.
+
+    The arrays copied while unpickling are not counted, sklearn trees copy their node
+    arrays into their own buffers, so a memory mapped forest keeps only its small arrays mapped.
+    """
+    total, seen, stack = 0, set(), [model]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if _is_mapped(item):
+                total += item.nbytes
+            elif item.dtype == object:
+                stack.extend(item.ravel())
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(
+                item, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+            stack.extend(vars(item).values())
+    return total
+
+
+def _write_atomic(dump: Callable, value, path: Path):
+    """
+    Write the file next to the path and rename it over the path, the processes which
+    memory mapped the previous file keep reading it instead of the half written one.
+    """
+    temp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        dump(value, temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def _dump_json(value, path: Path):
+    with open(path, "w") as f:
+        json.dump(value, f, indent=4)
+
+
+@dataclass(frozen=True)
+class ModelFormat:
+    """
+    Storing how a model artifact format is written and read.
+
+    safe is True when loading the file does not run arbitrary code, the joblib
+    formats are pickles and must be loaded only from a trusted location.
+    """
+    name: str
+    suffix: str # appended to the stem of the model path, empty to use the model path
+    safe: bool
+    dump: Callable
+    load: Callable
+    supports: Callable = None # whether the model can be written in the format, every model if None
+
+
+FORMATS = {
+    model_format.name: model_format for model_format in (
+        ModelFormat("joblib", "", False, joblib.dump, joblib.load),
+        # the uncompressed joblib file memory mapped, the numpy arrays are not read up front
+        ModelFormat("joblib_mmap", "", False, joblib.dump, _load_joblib_mmap),
+        ModelFormat("joblib_zlib", ".zlib.joblib", False, _dump_joblib_zlib, joblib.load),
+        ModelFormat("skops", ".skops", True, _dump_skops, _load_skops),
+        # tree ensembles flattened into node arrays, memory mapped and predicted with numpy
+        ModelFormat("flat_forest", ".flat.joblib", False, _dump_flat_forest, _load_joblib_mmap, FlatForest.supports),
+    )
+}
+
+
+class ModelStore:
+    """
+    Saves the model in the artifact formats next to the model path and loads it back.
+
+    The model path always holds the joblib file, the model version is its hash. The
+    other formats are written next to it along with a manifest of their size, load
+    time and whether they predict the same as the trained model.
+    """
+    def __init__(self, model_path: Path):
+        self.model_path = Path(model_path)
+        self.manifest_path = self.model_path.with_name(f"{self.model_path.stem}.formats.json")
+
+    def path(self, format_name: str) -> Path:
+        """
+        Return the path of the model file of the format, the joblib formats use the model path.
+        """
+        suffix = FORMATS[format_name].suffix
+        return self.model_path.with_name(self.model_path.stem + suffix) if suffix else self.model_path
+
+    def save(self, model, formats: list, sample=None, repeats: int = 3) -> dict:
+        """
+        Save the model in the formats and write the manifest of the formats.
+
+        Every format is loaded back repeats times, the fastest load is recorded. The
+        loaded model must predict the sample the same as the trained model, a format
+        failing to save, load or predict is recorded with its error and never served.
+
+        Params:
+            model: Trained model
+            formats (list): Names of the formats to write, joblib is always written
+            sample (pd.DataFrame): Records used to check the loaded models
+            repeats (int): Number of loads measured per format
+
+        Returns:
+            manifest (dict): Model version and the measurements of every format
+        """
+        unknown = [name for name in formats if name not in FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown model formats: {unknown}, supported formats: {list(FORMATS)}")
+        formats = ["joblib"] + [name for name in formats if name != "joblib"]
+        expected = None if sample is None else self._predict(model, sample)
+
+        written, entries = set(), {}
+        for name in formats:
+            model_format, path = FORMATS[name], self.path(name)
+            if model_format.supports is not None and not model_format.supports(model):
+                logger.info(f"Model format {name} does not support the model {type(model).__name__}, skipped")
+                continue
+            try:
+                if path not in written:
+                    _write_atomic(model_format.dump, model, path)
+                    written.add(path)
+                load_times = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    loaded = model_format.load(path)
+                    load_times.append(time.perf_counter() - start)
+                verified = expected is None or bool(np.array_equal(self._predict(loaded, sample), expected))
+                entries[name] = {
+                    "path": str(path),
+                    "size_bytes": os.path.getsize(path),
+                    "load_time_s": round(min(load_times), 6),
+                    "mapped_bytes": mapped_bytes(loaded),
+                    "safe": model_format.safe,
+                    "verified": verified,
+                }
+                logger.info(
+                    f"Model format {name}: {get_size(path)}, loaded in {entries[name]['load_time_s']}s, "
+                    f"{entries[name]['mapped_bytes']} bytes memory mapped, verified: {verified}")
+            except Exception as e:
+                if name == "joblib":
+                    raise
+                logger.exception(f"Exception occured while saving the model in the format {name}")
+                entries[name] = {"path": str(path), "safe": model_format.safe, "verified": False, "error": str(e)}
+
+        manifest = {"model_version": get_file_hash(self.model_path)[:12], "formats": entries}
+        _write_atomic(_dump_json, manifest, self.manifest_path)
+        logger.info(f"Model formats manifest saved at: {self.manifest_path}")
+        return manifest
+
+    @staticmethod
+    def _predict(model, sample):
+        if hasattr(model, "predict_proba"):
+            return np.asarray(model.predict_proba(sample))
+        return np.asarray(model.predict(sample))
+
+    def read_manifest(self, model_version: str) -> dict:
+        """
+        Return the manifest of the model version, None if it is missing or written for another model.
+        """
+        if not self.manifest_path.exists():
+            return None
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        return manifest if manifest.get("model_version") == model_version else None
+
+    def rank(self, model_version: str, preferred: str = "auto", safe_only: bool = False,
+             prefer_shared_memory: bool = False) -> list:
+        """
+        Return the formats to load the model from, the fastest verified format first.
+
+        With prefer_shared_memory the formats keeping at least half of the model file memory
+        mapped come first, so the workers of a host share one page cache copy of the model.
+
+        Params:
+            model_version (str): Version of the model, the manifest must be written for it
+            preferred (str): auto or the name of the format to load
+            safe_only (bool): Whether only the formats not running arbitrary code on load are used
+            prefer_shared_memory (bool): Whether the memory mapped bytes are ranked before the load time
+
+        Returns:
+            formats (list): Names of the formats, joblib if the manifest is not available
+        """
+        if preferred != "auto" and preferred not in FORMATS:
+            raise ValueError(f"Unknown model format: {preferred}, supported formats: {list(FORMATS)}")
+        manifest = self.read_manifest(model_version)
+        if manifest is None:
+            candidates = ["joblib"]
+        else:
+            entries = manifest["formats"]
+            verified = [name for name, entry in entries.items() if entry.get("verified") and name in FORMATS]
+            def is_shared(entry):
+                return entry.get("mapped_bytes", 0) >= MIN_SHARED_FRACTION * entry["size_bytes"]
+
+            candidates = sorted(
+                verified,
+                key=lambda name: (prefer_shared_memory and not is_shared(entries[name]), entries[name]["load_time_s"]))
+        if preferred != "auto":
+            candidates = [preferred]
+        if safe_only:
+            candidates = [name for name in candidates if FORMATS[name].safe]
+            if not candidates:
+                raise ValueError(f"No safe model format is available for the model version {model_version}")
+        return candidates
+
+    def load(self, format_name: str = "joblib"):
+        """
+        Load the model from the file of the format.
+        """
+        return FORMATS[format_name].load(self.path(format_name))
+
+    def load_fastest(self, model_version: str, preferred: str = "auto", safe_only: bool = False,
+                     prefer_shared_memory: bool = False):
+        """
+        Load the model from the first format of the rank which loads, the next format is
+        tried when a file fails to load.
+
+        Returns:
+            model: Loaded model
+            format_name (str): Format the model is loaded from
+        """
+        formats = self.rank(model_version, preferred, safe_only, prefer_shared_memory)
+        for position, format_name in enumerate(formats):
+            try:
+                return self.load(format_name), format_name
+            except Exception:
+                if position == len(formats) - 1:
+                    raise
+                logger.exception(f"Exception occured while loading the model in the format {format_name}, trying the next format")
@@ -6,24 +6,29 @@ and selects the best one based on evaluation metrics.
 
 import importlib
 import itertools
-import joblib
 import numpy as np
 import os
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from sklearn.metrics import accuracy_score, f1_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
 from urllib.parse import urlparse
 
 from customer_churn_prediction import logger
+from customer_churn_prediction.components.model_store import ModelStore
 from customer_churn_prediction.constants import CONFIG_FILE_PATH
 from customer_churn_prediction.entity.config_entity import ModelTrainerConfig
+from customer_churn_prediction.utils.common import read_data
 from customer_churn_prediction.utils.mlflow_utils import setup_mlflow
+from customer_churn_prediction.utils.profiling import profiled
 
 class ModelTrainer:
     def __init__(self, config: ModelTrainerConfig):
         self.config = config
         self.mlflow = setup_mlflow(CONFIG_FILE_PATH)
 
-    def _get_class_from_string(self, full_class_path):
+    @staticmethod
+    def _get_class_from_string(full_class_path):
         """
         Dynamically import model class.
         """
@@ -31,12 +36,17 @@ class ModelTrainer:
         module = importlib.import_module(module_name)
         return getattr(module, class_name)
     
-    def load_train_test_data_and_split(self):
+    @profiled
+    def load_train_test_data_and_split(self, train_data=None, test_data=None):
         """
         Load and split the training and testing datasets into features and target variables.
+
+        Datasets already in the memory are used instead of loading them.
         """
-        train_data = pd.read_csv(self.config.train_data_path)
-        test_data = pd.read_csv(self.config.test_data_path)
+        if train_data is None:
+            train_data = read_data(self.config.train_data_path, self.config.memory_map)
+        if test_data is None:
+            test_data = read_data(self.config.test_data_path, self.config.memory_map)
 
         train_x = train_data.drop([self.config.target_column],axis=1)
         train_y = train_data[self.config.target_column]
@@ -46,66 +56,226 @@ class ModelTrainer:
 
         return train_x, train_y, test_x, test_y
 
-    def train_and_select_best_model(self):
+    def get_candidates(self):
         """
-        Train specified models, log each experiment to MLflow,
-        and return the best model.
+        Return every model and hyperparameter combination of the params grid in a fixed order.
+
+        Models accepting random_state are seeded with the random_state of params.yaml
+        unless the grid sets it, so the fits are reproducible in any worker.
+
+        Returns:
+            candidates (list): (model_name, model_class, params_dict) of each combination
         """
-        best_model = None
-        best_score = - np.inf
-        best_model_name = None
-        train_x, train_y, test_x, test_y = self.load_train_test_data_and_split()
+        candidates = []
         for model_name, model_config in self.config.params.models.items():
             model_class = self._get_class_from_string(model_config.model_class)
+            is_seedable = "random_state" in model_class().get_params()
             param_grid = model_config.params
-
             keys, values = zip(*param_grid.items())
             for combination in itertools.product(*values):
                 params_dict = dict(zip(keys, combination))
-                model = model_class(**params_dict)
-
-                # Start MLflow run for each model-param combo
-                with self.mlflow.start_run(run_name=f"{model_name}"):
-                    self.mlflow.log_params(params_dict)
-
-                    model.fit(train_x,train_y)
-                    y_pred = model.predict(test_x)
-
-                    acc = accuracy_score(test_y, y_pred)
-                    f1 = f1_score(test_y, y_pred)
-                    roc_auc = roc_auc_score(test_y, y_pred)
-                    recall = recall_score(test_y, y_pred) # As our False Negative is more important in this usecase
-        
-
-                    self.mlflow.log_metric("accuracy",acc)
-                    self.mlflow.log_metric("f1_score",f1)
-                    self.mlflow.log_metric("roc_auc", roc_auc)
-                    self.mlflow.log_metric("recall", recall)
-
-                    tracking_scheme = urlparse(self.mlflow.get_tracking_uri()).scheme
-
-                    if tracking_scheme != "file":
-                        self.mlflow.sklearn.log_model(
-                            model,
-                            artifact_path=model_name,
-                            registered_model_name=model_name,
-                        )
-                    else:
-                        self.mlflow.sklearn.log_model(
-                            model, 
-                            artifact_path=model_name,
-                        )
-
-                logger.info(f"{model_name} | Params: {params_dict} | F1: {f1:.4f}")
-
-                if recall > best_score:
-                    best_score = recall
-                    best_model = model
-                    best_model_name = model_name
+                if is_seedable and "random_state" not in params_dict:
+                    params_dict["random_state"] = self.config.params.random_state
+                candidates.append((model_name, model_config.model_class, params_dict))
+        return candidates
+
+    def sample_candidates(self, candidates):
+        """
+        Return budget candidates sampled from the grid, kept in the grid order.
+        """
+        budget = self.config.params.model_search.budget
+        if budget >= len(candidates):
+            return candidates
+        rng = np.random.default_rng(self.config.params.random_state)
+        positions = np.sort(rng.choice(len(candidates), size=budget, replace=False))
+        return [candidates[position] for position in positions]
+
+    def halve_candidates(self, candidates, train_x, train_y, test_x, test_y):
+        """
+        Screen the candidates by successive halving on growing subsamples of the training data.
+
+        Every round fits the remaining candidates on a stratified subsample and keeps the
+        best 1/factor of them by recall, the next round uses factor times more data.
+        Rounds stop once at most budget candidates remain or the full data is reached.
+
+        Returns:
+            candidates (list): Surviving candidates in the grid order
+        """
+        search = self.config.params.model_search
+        budget = max(search.budget, 1)
+        fraction = search.min_fraction
+        while len(candidates) > budget and fraction < 1:
+            sample_x, _, sample_y, _ = train_test_split(
+                train_x, train_y,
+                train_size=fraction,
+                stratify=train_y,
+                random_state=self.config.params.random_state
+            )
+            results = self.fit_candidates(candidates, sample_x, sample_y, test_x, test_y)
+            keep = max(budget, int(np.ceil(len(candidates) / search.factor)))
+            ranking = sorted(range(len(candidates)), key=lambda position: -results[position][1]["recall"])
+            survivors = sorted(ranking[:keep])
+            for position in ranking[keep:]:
+                model_name, _, params_dict = candidates[position]
+                logger.info(
+                    f"Dropped {model_name} | Params: {params_dict} | "
+                    f"recall on {fraction:.0%} of data: {results[position][1]['recall']:.4f}")
+            logger.info(f"Halving round on {fraction:.0%} of data kept {keep} of {len(candidates)} candidates")
+            candidates = [candidates[position] for position in survivors]
+            fraction *= search.factor
+        return candidates
+
+    @profiled
+    def search_candidates(self, train_x, train_y, test_x, test_y):
+        """
+        Return the candidates to fully train based on the search strategy of params.yaml.
+        """
+        candidates = self.get_candidates()
+        strategy = self.config.params.model_search.strategy
+        if strategy == "random":
+            candidates = self.sample_candidates(candidates)
+        elif strategy == "halving":
+            candidates = self.halve_candidates(candidates, train_x, train_y, test_x, test_y)
+        elif strategy != "grid":
+            raise ValueError(f"Model search strategy: {strategy} is not one of grid, halving or random")
+        logger.info(f"{strategy} search selected {len(candidates)} candidates for the full training")
+        return candidates
+
+    @profiled
+    def fit_candidates(self, candidates, train_x, train_y, test_x, test_y):
+        """
+        Fit and score the candidates, in a process pool if max_workers is more than one.
+
+        Returns:
+            results (list): (model, metrics) of each candidate in the order of the candidates
+        """
+        max_workers = min(self.config.max_workers, len(candidates))
+        if max_workers <= 1:
+            _init_worker(train_x, train_y, test_x, test_y)
+            return [_fit_candidate(model_class, params_dict) for _, model_class, params_dict in candidates]
+
+        logger.info(f"Fitting {len(candidates)} candidates with {max_workers} worker processes")
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(train_x, train_y, test_x, test_y, True)
+        ) as executor:
+            futures = [
+                executor.submit(_fit_candidate, model_class, params_dict)
+                for _, model_class, params_dict in candidates
+            ]
+            return [future.result() for future in futures]
+
+    @profiled
+    def log_candidate(self, model_name, params_dict, model, metrics):
+        """
+        Log the params, metrics and the model of a candidate to MLflow.
+        """
+        with self.mlflow.start_run(run_name=f"{model_name}"):
+            self.mlflow.log_params(params_dict)
+            for metric_name, value in metrics.items():
+                self.mlflow.log_metric(metric_name, value)
+
+            tracking_scheme = urlparse(self.mlflow.get_tracking_uri()).scheme
+
+            if tracking_scheme != "file":
+                self.mlflow.sklearn.log_model(
+                    model,
+                    artifact_path=model_name,
+                    registered_model_name=model_name,
+                )
+            else:
+                self.mlflow.sklearn.log_model(
+                    model, 
+                    artifact_path=model_name,
+                )
+
+    @profiled
+    def train_and_select_best_model(self, train_data=None, test_data=None):
+        """
+        Train specified models, log each experiment to MLflow,
+        and return the best model.
+
+        Candidates are chosen by the search strategy and fitted in parallel when
+        configured, MLflow logging and the selection run in this process in the grid
+        order, so the selected model is the same as the sequential run.
+        """
+        best_model = None
+        best_score = - np.inf
+        best_model_name = None
+        train_x, train_y, test_x, test_y = self.load_train_test_data_and_split(train_data, test_data)
+        candidates = self.search_candidates(train_x, train_y, test_x, test_y)
+        results = self.fit_candidates(candidates, train_x, train_y, test_x, test_y)
+        for (model_name, _, params_dict), (model, metrics) in zip(candidates, results):
+            self.log_candidate(model_name, params_dict, model, metrics)
+            logger.info(f"{model_name} | Params: {params_dict} | F1: {metrics['f1_score']:.4f}")
+
+            recall = metrics["recall"] # As our False Negative is more important in this usecase
+            if recall > best_score:
+                best_score = recall
+                best_model = model
+                best_model_name = model_name
         logger.info(f"Best model: {best_model_name} with recall={best_score:.4f}")
-        joblib.dump(best_model, os.path.join(self.config.root_dir,self.config.model_name))
+        # every saved format must predict the whole test set the same as the trained model
+        self.save_model(best_model, test_x)
         logger.info(f"Best model saved at: {os.path.join(self.config.root_dir,self.config.model_name)}")
         return best_model, best_model_name, best_score
 
+    @profiled
+    def save_model(self, model, sample=None):
+        """
+        Save the selected model in the configured artifact formats along with the
+        manifest of their size and load time, the serving loads the fastest one.
 
-    
+        Params:
+            model: Selected model
+            sample (pd.DataFrame): Records the model of every format must predict the same
+        """
+        model_store = ModelStore(Path(os.path.join(self.config.root_dir, self.config.model_name)))
+        return model_store.save(model, self.config.model_formats, sample, self.config.format_load_repeats)
+
+
+_worker_data = {}
+
+
+def _init_worker(train_x, train_y, test_x, test_y, single_threaded=False):
+    """
+    Store the training and test data once per worker process.
+    """
+    _worker_data.update(
+        train_x=train_x, train_y=train_y, test_x=test_x, test_y=test_y,
+        single_threaded=single_threaded
+    )
+
+
+def _fit_candidate(model_class_path, params_dict):
+    """
+    Fit a candidate on the worker data and score it on the test data.
+
+    In the worker processes the model runs single threaded to not oversubscribe
+    the cores, its n_jobs is restored before returning it.
+
+    Returns:
+        model: Fitted model
+        metrics (dict): accuracy, f1_score, roc_auc and recall of the model
+    """
+    model_class = ModelTrainer._get_class_from_string(model_class_path)
+    model = model_class(**params_dict)
+
+    restore_n_jobs = _worker_data["single_threaded"] and "n_jobs" in model.get_params() and "n_jobs" not in params_dict
+    if restore_n_jobs:
+        n_jobs = model.get_params()["n_jobs"]
+        model.set_params(n_jobs=1)
+    model.fit(_worker_data["train_x"], _worker_data["train_y"])
+    y_pred = model.predict(_worker_data["test_x"])
+    if restore_n_jobs:
+        model.set_params(n_jobs=n_jobs)
+
+    test_y = _worker_data["test_y"]
+    metrics = {
+        "accuracy": accuracy_score(test_y, y_pred),
+        "f1_score": f1_score(test_y, y_pred),
+        "roc_auc": roc_auc_score(test_y, y_pred),
+        "recall": recall_score(test_y, y_pred),
+    }
+    return model, metrics
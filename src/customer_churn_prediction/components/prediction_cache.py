@@ -0,0 +1,133 @@
+"""
+Prediction cache component keeps the model output of the recently predicted records, so
+the customers scored again and again are not predicted by the model every time.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from customer_churn_prediction.entity.config_entity import PredictionCacheConfig
+from customer_churn_prediction.utils.metrics import CACHE_LOOKUPS
+
+class PredictionCache:
+    """
+    Least recently used cache of the model output of the encoded records, an entry
+    expires ttl_s seconds after it was stored.
+
+    The records are keyed after the validation and the encoding, so the same customer
+    sent as "5" or 5 gets the same key, along with the model and encoder version. The
+    churn probability is cached instead of the decision, so a tuned threshold applies
+    to the cached records as well.
+    """
+    def __init__(self, config: PredictionCacheConfig):
+        self.config = config
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "flushes": 0}
+
+    @staticmethod
+    def keys(encoded_data: pd.DataFrame, versions: dict) -> list:
+        """
+        Return the key of every encoded record, the hash of its values and the versions of the artifacts.
+        """
+        # the values as float64 do not depend on the dtypes of the columns, adding 0.0 turns -0.0 into 0.0
+        rows = np.ascontiguousarray(encoded_data.to_numpy(dtype=np.float64) + 0.0)
+        model_version, encoder_version = versions["model_version"], versions["encoder_version"]
+        return [
+            (hashlib.blake2b(row.tobytes(), digest_size=16).digest(), model_version, encoder_version)
+            for row in rows
+        ]
+
+    def get_many(self, keys: list) -> list:
+        """
+        Return the cached value of every key, None for the keys not cached or expired.
+        """
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self._counts["expirations"] += 1
+                    entry = None
+                if entry is None:
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+            hits = sum(value is not None for value in values)
+            self._counts["hits"] += hits
+            self._counts["misses"] += len(keys) - hits
+        CACHE_LOOKUPS.labels(cache="predictions", result="hit").inc(hits)
+        CACHE_LOOKUPS.labels(cache="predictions", result="miss").inc(len(keys) - hits)
+        return values
+
+    def put_many(self, keys: list, values):
+        """
+        Store the values, the least recently used entries are evicted beyond max_entries.
+        """
+        expires_at = time.monotonic() + self.config.ttl_s
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def lookup(self, encoded_data: pd.DataFrame, versions: dict, compute) -> np.ndarray:
+        """
+        Return the model output of the encoded records, only the records not cached are computed.
+
+        Params:
+            encoded_data (pd.DataFrame): Validated and encoded records
+            versions (dict): Model and encoder version of the artifacts predicting the records
+            compute (Callable): Returns the model output of the passed records
+
+        Returns:
+            output (np.ndarray): Model output of every record
+        """
+        keys = self.keys(encoded_data, versions)
+        values = self.get_many(keys)
+        missing = [position for position, value in enumerate(values) if value is None]
+        if not missing:
+            return np.asarray(values)
+        computed = np.asarray(compute(encoded_data.iloc[missing]))
+        self.put_many([keys[position] for position in missing], list(computed))
+        if len(missing) == len(keys):
+            return computed
+        output = np.empty(len(keys), dtype=computed.dtype)
+        cached = np.ones(len(keys), dtype=bool)
+        cached[missing] = False
+        output[cached] = [value for value in values if value is not None]
+        output[~cached] = computed
+        return output
+
+    def clear(self, artifacts=None):
+        """
+        Drop all the entries, called by the predictor registry whenever new artifacts are served.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._counts["flushes"] += 1
+
+    def stats(self) -> dict:
+        """
+        Return the lookups, evictions and the size of the cache of this process.
+        """
+        with self._lock:
+            counts, size = dict(self._counts), len(self._entries)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "hit_ratio": round(counts["hits"] / lookups, 4) if lookups else None,
+            "size": size,
+            "max_entries": self.config.max_entries,
+            "ttl_s": self.config.ttl_s,
+        }
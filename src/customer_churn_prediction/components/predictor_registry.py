@@ -0,0 +1,335 @@
+"""
+Predictor registry component keeps the trained model, the encoders and the schema
+resident in the process, so the prediction requests do not reload them from the disk.
+"""
+
+import os
+import pickle
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.components.decision_engine import DecisionEngine
+from customer_churn_prediction.components.encoding_table import EncodingTable
+from customer_churn_prediction.components.model_store import ModelStore
+from customer_churn_prediction.components.schema_validator import SchemaValidator
+from customer_churn_prediction.entity.config_entity import ModelPredictionConfig
+from customer_churn_prediction.utils.common import get_file_hash
+from customer_churn_prediction.utils.metrics import CACHE_LOOKUPS, MODEL_INFO, MODEL_LOADS
+
+
+@dataclass(frozen=True)
+class PredictorArtifacts:
+    """
+    Storing the artifacts loaded for the prediction along with their versions.
+    """
+    model: Any
+    encoding_table: EncodingTable
+    decision_engine: DecisionEngine
+    schema: dict
+    model_version: str
+    encoder_version: str
+    model_format: str = "joblib"
+
+    @property
+    def versions(self) -> dict:
+        return {"model_version": self.model_version, "encoder_version": self.encoder_version}
+
+
+class PredictorRegistry:
+    """
+    Loads the prediction artifacts once per process and reloads them
+    only when the artifact files are changed on the disk.
+
+    The encoding table is preferred, encoders.pkl is converted to the table
+    for the artifacts created before the table was introduced.
+
+    With hot reload the files are checked by a background watcher instead of every
+    request. A changed model is loaded and checked on a canned input off the request
+    path, then swapped in as a whole, so a request keeps using the artifacts it
+    started with.
+    """
+    def __init__(self, config: ModelPredictionConfig):
+        self.config = config
+        self.validator = SchemaValidator(config.schema, config.constraints)
+        self.model_store = ModelStore(Path(config.model_path))
+        self.load_count = 0
+        self._lock = threading.Lock()
+        self._artifacts = None
+        self._stamps = None
+        self._failed_stamps = None
+        self._watcher = None
+        self._stop_watcher = threading.Event()
+        self._listeners = []
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        Whether the artifacts are loaded and checked, so the requests are served without loading them.
+        """
+        return self._artifacts is not None
+
+    def _get_stamp(self, path):
+        """
+        Return the modification time and size of the file or None if it does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _current_stamps(self):
+        """
+        Return the stamps of the model, the encoding, the decision threshold and the model formats file.
+        """
+        return (
+            self._get_stamp(self.config.model_path),
+            self._get_stamp(self.config.encoding_table_file),
+            self._get_stamp(self.config.encoder_file),
+            self._get_stamp(self.config.decision_threshold_file),
+            self._get_stamp(self.model_store.manifest_path)
+        )
+
+    def _load_encoding_table(self, table_stamp) -> EncodingTable:
+        """
+        Load the encoding table, build it from encoders.pkl if the table does not exist.
+        """
+        if table_stamp is not None:
+            return EncodingTable.load(self.config.encoding_table_file)
+        with open(self.config.encoder_file, "rb") as f:
+            encoders = pickle.load(f)
+        return EncodingTable.from_label_encoders(encoders)
+
+    def _load_decision_engine(self, threshold_stamp, model_version) -> DecisionEngine:
+        """
+        Load the decision threshold tuned for the model, the default threshold is used
+        if the threshold is not tuned yet or tuned for another model.
+        """
+        if threshold_stamp is not None:
+            decision_engine = DecisionEngine.load(self.config.decision_threshold_file)
+            if decision_engine.model_version == model_version:
+                return decision_engine
+            logger.info(
+                f"Decision threshold is tuned for model version {decision_engine.model_version}, "
+                f"using the default threshold {self.config.default_threshold}")
+        return DecisionEngine(self.config.default_threshold, model_version)
+
+    def _load(self, stamps) -> PredictorArtifacts:
+        """
+        Load the artifacts and count the load by its result.
+        """
+        try:
+            artifacts = self._load_artifacts(stamps)
+        except Exception:
+            MODEL_LOADS.labels(result="failure").inc()
+            raise
+        MODEL_LOADS.labels(result="success").inc()
+        return artifacts
+
+    def _serve(self, artifacts: PredictorArtifacts, stamps):
+        """
+        Swap in the artifacts served by the next requests, called with the lock held.
+        """
+        self._artifacts, self._stamps = artifacts, stamps
+        MODEL_INFO.clear()
+        MODEL_INFO.labels(model_version=artifacts.model_version, encoder_version=artifacts.encoder_version).set(1)
+        for listener in self._listeners:
+            try:
+                listener(artifacts)
+            except Exception:
+                logger.exception(f"Exception occured while notifying the listener {listener} of the served artifacts")
+
+    def add_listener(self, listener):
+        """
+        Call the listener with the artifacts whenever new artifacts are served, like the caches
+        of the predictions which must be flushed once the model or the encoders are reloaded.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _load_artifacts(self, stamps) -> PredictorArtifacts:
+        """
+        Load the model, the encoders and the decision threshold from the disk.
+        """
+        model_stamp, table_stamp, encoder_stamp, threshold_stamp, _ = stamps
+        if model_stamp is None:
+            raise FileNotFoundError("Model is not exist yet train the model first")
+        if table_stamp is None and encoder_stamp is None:
+            raise FileNotFoundError(
+                f"Encoding table: {self.config.encoding_table_file} is not exist yet run the data transformation first")
+
+        model_version = get_file_hash(Path(self.config.model_path))[:12]
+        model, model_format = self.model_store.load_fastest(
+            model_version, self.config.model_format, self.config.safe_model_formats_only,
+            self.config.prefer_shared_memory)
+        encoding_table = self._load_encoding_table(table_stamp)
+        artifacts = PredictorArtifacts(
+            model=model,
+            encoding_table=encoding_table,
+            decision_engine=self._load_decision_engine(threshold_stamp, model_version),
+            schema=dict(self.config.schema),
+            model_version=model_version,
+            encoder_version=encoding_table.fingerprint,
+            model_format=model_format
+        )
+        self.check(artifacts)
+        self.load_count += 1
+        logger.info(
+            f"Prediction artifacts loaded, model version: {artifacts.model_version} ( {artifacts.model_format} ), "
+            f"encoder version: {artifacts.encoder_version}, "
+            f"decision threshold: {artifacts.decision_engine.threshold}"
+        )
+        return artifacts
+
+    def check(self, artifacts: PredictorArtifacts):
+        """
+        Predict a canned record with the loaded artifacts before they are used for serving.
+
+        The record holds the first category of every categorical column and zero for
+        the numerical columns, encoded the same way as the prediction requests. With the
+        nan unseen category policy the record is predicted again with the categories missing.
+
+        Raises:
+            ValueError: If the encoding table or the model does not fit the schema, or the
+                model does not accept the missing values of the nan unseen category policy
+        """
+        canned_record = {}
+        for column, datatype in artifacts.schema.items():
+            if datatype == "object":
+                if column not in artifacts.encoding_table:
+                    raise ValueError(f"Encoding table {artifacts.encoder_version} has no column: {column}")
+                canned_record[column] = np.zeros(1, dtype=np.int64)
+            else:
+                canned_record[column] = np.zeros(1, dtype=datatype)
+        canned_record = pd.DataFrame(canned_record)
+        prediction = np.asarray(artifacts.model.predict(canned_record))
+        if prediction.shape != (1,):
+            raise ValueError(
+                f"Model {artifacts.model_version} returned prediction of shape {prediction.shape} for a canned record")
+        if hasattr(artifacts.model, "predict_proba"):
+            probability = np.asarray(artifacts.model.predict_proba(canned_record))
+            if not np.isfinite(probability).all():
+                raise ValueError(f"Model {artifacts.model_version} returned invalid probability for a canned record")
+        if self.config.unseen_category_policy == "nan":
+            categorical_columns = [column for column, datatype in artifacts.schema.items() if datatype == "object"]
+            missing_record = canned_record.astype({column: np.float64 for column in categorical_columns})
+            missing_record[categorical_columns] = np.nan
+            try:
+                artifacts.model.predict(missing_record)
+            except ValueError as e:
+                raise ValueError(
+                    f"Model {artifacts.model_version} does not accept missing values, the unseen category "
+                    f"policy nan needs a model which does, use error or fallback: {e}") from e
+
+    def warm_up(self) -> bool:
+        """
+        Load and check the artifacts before the first request, a missing model is logged
+        and loaded once it is trained.
+
+        Returns:
+            is_ready (bool): Whether the artifacts are loaded
+        """
+        try:
+            self.get()
+        except Exception:
+            logger.exception(f"Exception occured while warming up the predictor, the predictor is not ready")
+        return self.is_ready
+
+    def get(self) -> PredictorArtifacts:
+        """
+        Return the loaded artifacts.
+
+        Without hot reload the files are checked on every call and the artifacts are
+        reloaded first if the files are changed, with hot reload the watcher swaps them.
+
+        Returns:
+            artifacts (PredictorArtifacts): Model, encoders and schema used for the prediction
+        """
+        artifacts = self._artifacts
+        if artifacts is not None and (self.config.hot_reload or self._current_stamps() == self._stamps):
+            CACHE_LOOKUPS.labels(cache="predictor_registry", result="hit").inc()
+            return artifacts
+        CACHE_LOOKUPS.labels(cache="predictor_registry", result="miss").inc()
+        stamps = self._current_stamps()
+        with self._lock:
+            if self._artifacts is None or stamps != self._stamps:
+                self._serve(self._load(stamps), stamps)
+            return self._artifacts
+
+    def reload(self) -> bool:
+        """
+        Load the changed artifacts and swap them with the served ones.
+
+        The served artifacts are kept when the files are still being written, or
+        the new artifacts failed to load or to predict the canned record.
+
+        Returns:
+            is_reloaded (bool): Whether the new artifacts are swapped in
+        """
+        stamps = self._current_stamps()
+        if stamps == self._stamps or stamps == self._failed_stamps:
+            return False
+        # wait for the writer to finish, the files must be unchanged for an interval
+        if self._stop_watcher.wait(self.config.reload_settle_s) or stamps != self._current_stamps():
+            return False
+        try:
+            artifacts = self._load(stamps)
+        except Exception:
+            logger.exception(f"Exception occured while reloading the prediction artifacts, serving the previous version")
+            self._failed_stamps = stamps
+            return False
+        with self._lock:
+            previous = self._artifacts
+            self._serve(artifacts, stamps)
+        self._failed_stamps = None
+        if previous is not None:
+            logger.info(
+                f"Prediction artifacts swapped, model version: {previous.model_version} -> {artifacts.model_version}, "
+                f"encoder version: {previous.encoder_version} -> {artifacts.encoder_version}"
+            )
+        return True
+
+    def _watch(self):
+        """
+        Reload the artifacts whenever the files are changed until the watcher is stopped.
+        """
+        while not self._stop_watcher.wait(self.config.reload_interval_s):
+            try:
+                self.reload()
+            except Exception:
+                logger.exception(f"Exception occured while watching the prediction artifacts")
+
+    def start_watcher(self):
+        """
+        Start the background thread watching the artifact files, it is started once per process.
+        """
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop_watcher.clear()
+            self._watcher = threading.Thread(target=self._watch, name="predictor-watcher", daemon=True)
+            self._watcher.start()
+        logger.info(f"Watching the prediction artifacts every {self.config.reload_interval_s} seconds")
+
+    def stop_watcher(self):
+        """
+        Stop the background watcher.
+        """
+        self._stop_watcher.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def clear(self):
+        """
+        Drop the loaded artifacts, next call of get will load them again.
+        """
+        with self._lock:
+            self._artifacts = None
+            self._stamps = None
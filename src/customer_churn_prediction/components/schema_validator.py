@@ -0,0 +1,262 @@
+"""
+Schema validator component checks the columns, their data types and their values of the
+passed data against the schema, the schema is compiled once and the result is returned per call.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from customer_churn_prediction.utils.common import read_data_chunks
+
+# pandas >= 3 reads the text columns as str instead of object
+DTYPE_ALIASES = {"str": "object", "string": "object"}
+
+
+def normalize_dtype(datatype) -> str:
+    """
+    Return the data type name used to compare the data types with the schema.
+    """
+    datatype = str(datatype)
+    return DTYPE_ALIASES.get(datatype, datatype)
+
+
+def json_type(datatype) -> str:
+    """
+    Return the json type of the values of the data type.
+    """
+    datatype = normalize_dtype(datatype)
+    if datatype.startswith(("int", "uint")):
+        return "integer"
+    if datatype.startswith("float"):
+        return "number"
+    if datatype == "bool":
+        return "boolean"
+    return "string"
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """
+    Storing the result of validating a data against the schema.
+
+    invalid_mask flags the values violating the constraints per row and column,
+    it is kept only for the in-memory data, the files report the invalid_counts.
+    """
+    status: bool
+    missing_columns: tuple = ()
+    mismatched_columns: dict = field(default_factory=dict)
+    invalid_counts: dict = field(default_factory=dict)
+    rows: int = 0
+    invalid_mask: pd.DataFrame = None
+    messages: tuple = ()
+
+    @property
+    def message(self) -> str:
+        return "\n".join(self.messages)
+
+    @property
+    def invalid_rows(self) -> np.ndarray:
+        """
+        Return whether each row has any value violating the constraints.
+        """
+        if self.invalid_mask is None:
+            return None
+        return self.invalid_mask.to_numpy().any(axis=1)
+
+
+class SchemaValidator:
+    """
+    Validates the data against the schema compiled from schema.yaml.
+
+    Columns are checked for presence and data type, the constrained columns are checked
+    for the allowed categories and the numerical range with a vectorized pass per column.
+    The validator does not keep any state of the validated data, so a single instance
+    is shared by the concurrent requests.
+    """
+    def __init__(self, schema: dict, constraints: dict = None):
+        self.schema = {column: str(datatype) for column, datatype in schema.items()}
+        self.columns = tuple(self.schema)
+        self._dtypes = {column: normalize_dtype(datatype) for column, datatype in self.schema.items()}
+        self._categories = {}
+        self._ranges = {}
+        for column, rule in (constraints or {}).items():
+            if column not in self.schema:
+                raise ValueError(f"Constraint column: {column} is not in the schema")
+            if "categories" in rule:
+                self._categories[column] = pd.Index(list(rule["categories"]))
+            if "min" in rule or "max" in rule:
+                self._ranges[column] = (rule.get("min", -np.inf), rule.get("max", np.inf))
+        self.constrained_columns = tuple(
+            column for column in self.columns if column in self._categories or column in self._ranges)
+        self._json_rules = self.json_schema()["properties"]
+
+    def check_dtypes(self, dtypes: dict):
+        """
+        Compare the data types of the data columns with the schema.
+
+        Returns:
+            missing_columns (list): Schema columns not present in the data
+            mismatched_columns (dict): Columns having a different data type along with their data type
+        """
+        missing_columns, mismatched_columns = [], {}
+        for column, datatype in self._dtypes.items():
+            if column not in dtypes:
+                missing_columns.append(column)
+            elif normalize_dtype(dtypes[column]) != datatype:
+                mismatched_columns[column] = str(dtypes[column])
+        return missing_columns, mismatched_columns
+
+    def invalid_values(self, column: str, values: pd.Series) -> np.ndarray:
+        """
+        Return whether each value of the column violates its allowed categories or range.
+        """
+        invalid = np.zeros(len(values), dtype=bool)
+        if column in self._categories:
+            invalid |= ~values.isin(self._categories[column]).to_numpy()
+        if column in self._ranges:
+            low, high = self._ranges[column]
+            numeric = pd.to_numeric(values, errors="coerce")
+            invalid |= ~numeric.between(low, high).to_numpy()
+        return invalid
+
+    def value_mask(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return the mask of the values violating the constraints of the constrained columns in the data.
+        """
+        return pd.DataFrame(
+            {
+                column: self.invalid_values(column, data[column])
+                for column in self.constrained_columns if column in data.columns
+            },
+            index=data.index
+        )
+
+    def json_schema(self) -> dict:
+        """
+        Return the json schema of a record, generated from the schema and its constraints.
+        """
+        properties = {}
+        for column, datatype in self._dtypes.items():
+            rule = {"type": json_type(datatype)}
+            if column in self._categories:
+                rule["enum"] = self._categories[column].tolist()
+            if column in self._ranges:
+                low, high = self._ranges[column]
+                if np.isfinite(low):
+                    rule["minimum"] = low
+                if np.isfinite(high):
+                    rule["maximum"] = high
+            properties[column] = rule
+        return {"type": "object", "properties": properties, "required": list(self.columns)}
+
+    def check_record(self, record: dict) -> list:
+        """
+        Check a json record for the schema columns, their json types and the constraints.
+
+        Returns:
+            errors (list): Column and message of every invalid value, empty if the record is valid
+        """
+        errors = []
+        for column, rule in self._json_rules.items():
+            if column not in record or record[column] is None:
+                errors.append((column, "is required"))
+                continue
+            value = record[column]
+            kind = rule["type"]
+            # bool is an int in python but not in json
+            if kind == "integer":
+                is_valid = (isinstance(value, int) or isinstance(value, float) and value.is_integer()) \
+                    and not isinstance(value, bool)
+            elif kind == "number":
+                is_valid = isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+            elif kind == "boolean":
+                is_valid = isinstance(value, bool)
+            else:
+                is_valid = isinstance(value, str)
+            if not is_valid:
+                errors.append((column, f"must be of type {kind}, got {value!r}"))
+            elif "enum" in rule and value not in rule["enum"]:
+                errors.append((column, f"must be one of {rule['enum']}, got {value!r}"))
+            elif "minimum" in rule and value < rule["minimum"]:
+                errors.append((column, f"must be at least {rule['minimum']}, got {value!r}"))
+            elif "maximum" in rule and value > rule["maximum"]:
+                errors.append((column, f"must be at most {rule['maximum']}, got {value!r}"))
+        return errors
+
+    def validate(self, data: pd.DataFrame, check_values: bool = True) -> ValidationResult:
+        """
+        Validate the columns, their data types and the constrained values of the data.
+
+        Params:
+            data (pd.DataFrame): Data to validate the schema
+            check_values (bool): Whether to check the values of the constrained columns
+
+        Returns:
+            result (ValidationResult): Whether the data is validated along with the per column messages
+                and the row level mask of the invalid values
+        """
+        missing_columns, mismatched_columns = self.check_dtypes(data.dtypes.to_dict())
+        invalid_mask = self.value_mask(data) if check_values else None
+        invalid_counts = {} if invalid_mask is None else {
+            column: int(count) for column, count in invalid_mask.sum().items() if count
+        }
+        return self._result(missing_columns, mismatched_columns, invalid_counts, len(data), invalid_mask)
+
+    def validate_file(self, path: Path, chunk_size: int = 100000, sample_rows: int = None) -> ValidationResult:
+        """
+        Validate a CSV or Parquet file without loading it whole in the memory.
+
+        Params:
+            path (Path): Path of the file to validate
+            chunk_size (int): Number of rows validated at a time
+            sample_rows (int): Validate only the header and the first rows of the file, all rows if None
+
+        Returns:
+            result (ValidationResult): Whether the file is validated along with the per column messages
+                and the number of invalid values per column
+        """
+        missing_columns, mismatched_columns, invalid_counts, rows = None, {}, {}, 0
+        chunk_size = min(chunk_size, sample_rows) if sample_rows else chunk_size
+        for chunk in read_data_chunks(Path(path), chunk_size):
+            if sample_rows:
+                chunk = chunk.iloc[:sample_rows - rows]
+            missing, mismatched = self.check_dtypes(chunk.dtypes.to_dict())
+            missing_columns = missing if missing_columns is None else missing_columns
+            for column, datatype in mismatched.items():
+                mismatched_columns.setdefault(column, datatype)
+            for column, count in self.value_mask(chunk).sum().items():
+                if count:
+                    invalid_counts[column] = invalid_counts.get(column, 0) + int(count)
+            rows += len(chunk)
+            if sample_rows and rows >= sample_rows:
+                break
+        if missing_columns is None:
+            missing_columns = list(self.columns)
+        return self._result(missing_columns, mismatched_columns, invalid_counts, rows)
+
+    def _result(self, missing_columns, mismatched_columns, invalid_counts, rows, invalid_mask=None):
+        """
+        Build the validation result along with the per column messages.
+        """
+        messages = []
+        for column in self.columns:
+            if column in missing_columns:
+                messages.append(f"{column} not validated")
+            elif column in mismatched_columns:
+                messages.append(f"{column} validated without datatype")
+            else:
+                messages.append(f"{column} validated along with datatype")
+            if invalid_counts.get(column):
+                messages.append(f"{column} has {invalid_counts[column]} invalid values out of {rows}")
+        return ValidationResult(
+            status=not missing_columns and not mismatched_columns and not invalid_counts,
+            missing_columns=tuple(missing_columns),
+            mismatched_columns=mismatched_columns,
+            invalid_counts=invalid_counts,
+            rows=rows,
+            invalid_mask=invalid_mask,
+            messages=tuple(messages)
+        )
@@ -0,0 +1,170 @@
+"""
+Training jobs component runs the training command in the background, so the serving
+workers are not blocked while the model is retrained.
+"""
+
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.entity.config_entity import TrainingJobsConfig
+
+
+class TrainingJob:
+    """
+    Status and incremental logs of a training run.
+    """
+    def __init__(self, job_id: str, command: list, max_log_lines: int):
+        self.job_id = job_id
+        self.command = command
+        self.status = "queued"
+        self.return_code = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._logs = deque(maxlen=max_log_lines)
+        self._total_lines = 0
+        self._changed = threading.Condition()
+
+    @property
+    def is_finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def append_log(self, line: str):
+        """
+        Append a log line and wake up the readers waiting for it.
+        """
+        with self._changed:
+            self._logs.append(line)
+            self._total_lines += 1
+            self._changed.notify_all()
+
+    def set_status(self, status: str, return_code: int = None):
+        """
+        Update the status of the job and wake up the readers.
+        """
+        with self._changed:
+            self.status = status
+            if status == "running":
+                self.started_at = time.time()
+            if status in ("succeeded", "failed"):
+                self.return_code = return_code
+                self.finished_at = time.time()
+            self._changed.notify_all()
+
+    def read_logs(self, offset: int = 0):
+        """
+        Return the log lines from the offset and the offset of the next line.
+
+        Lines older than max_log_lines are dropped, reading starts at the oldest kept line.
+        """
+        with self._changed:
+            first_kept = self._total_lines - len(self._logs)
+            start = max(offset, first_kept)
+            lines = list(self._logs)[start - first_kept:]
+            return lines, self._total_lines
+
+    def follow_logs(self, offset: int = 0, timeout: float = 15.0):
+        """
+        Yield the log lines from the offset as they are written until the job is finished.
+        """
+        while True:
+            lines, offset = self.read_logs(offset)
+            yield from lines
+            with self._changed:
+                if self.is_finished and offset == self._total_lines:
+                    return
+                if offset == self._total_lines:
+                    self._changed.wait(timeout)
+
+    def to_dict(self, offset: int = 0):
+        """
+        Return the status of the job along with the log lines from the offset.
+        """
+        lines, next_offset = self.read_logs(offset)
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "return_code": self.return_code,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "logs": lines,
+            "next_offset": next_offset,
+        }
+
+
+class TrainingJobManager:
+    """
+    Runs the training jobs on a background executor with a concurrency limit.
+
+    When max_queued_jobs jobs are already waiting, the last queued job is returned
+    instead of queuing another one.
+    """
+    def __init__(self, config: TrainingJobsConfig):
+        self.config = config
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.max_concurrent_jobs,
+            thread_name_prefix="training-job"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self):
+        """
+        Queue a training job.
+
+        Returns:
+            job (TrainingJob): Queued job or the already queued one
+            is_new (bool): Whether a new job is queued
+        """
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job.status == "queued"]
+            if len(queued) >= self.config.max_queued_jobs:
+                return queued[-1], False
+            job = TrainingJob(uuid.uuid4().hex[:12], list(self.config.command), self.config.max_log_lines)
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.config.max_job_history:
+                oldest_id = next(iter(self._jobs))
+                if not self._jobs[oldest_id].is_finished:
+                    break
+                self._jobs.pop(oldest_id)
+        self._executor.submit(self._run, job)
+        logger.info(f"Training job {job.job_id} queued")
+        return job, True
+
+    def get(self, job_id: str):
+        """
+        Return the job of the id or None.
+        """
+        return self._jobs.get(job_id)
+
+    def _run(self, job: TrainingJob):
+        """
+        Run the training command and capture its output line by line.
+        """
+        job.set_status("running")
+        logger.info(f"Training job {job.job_id} started: {' '.join(job.command)}")
+        try:
+            process = subprocess.Popen(
+                job.command,
+                cwd=".",
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+            for line in process.stdout:
+                job.append_log(line.rstrip("\n"))
+            return_code = process.wait()
+        except Exception as e:
+            logger.exception(f"Exception occured while running the training job {job.job_id}")
+            job.append_log(f"Training failed with error: {e}")
+            job.set_status("failed")
+            return
+        job.set_status("succeeded" if return_code == 0 else "failed", return_code)
+        logger.info(f"Training job {job.job_id} finished with status {job.status}")
@@ -3,6 +3,8 @@ Configuration manager module for the Customer Churn Prediction project.
 Handles loading and managing project configuration, parameters, and schema.
 """
 
+from pathlib import Path
+
 from customer_churn_prediction.constants import (
     CONFIG_FILE_PATH, 
     PARAMS_FILE_PATH,
@@ -14,7 +16,12 @@ from customer_churn_prediction.entity.config_entity import (
     DataTransformationConfig,
     ModelTrainerConfig,
     ModelEvaluationConfig,
-    ModelPredictionConfig
+    ModelPredictionConfig,
+    PredictionCacheConfig,
+    BulkPredictionConfig,
+    TrainingJobsConfig,
+    ServingConfig,
+    InferenceServiceConfig
 )
 from customer_churn_prediction.utils.common import create_directory, read_yaml
 
@@ -36,6 +43,12 @@ class ConfigurationManager:
 
         create_directory([self.config.artifacts_root])
 
+    def get_data_file(self, path) -> Path:
+        """
+        Return the path of the intermediate dataset with the extension of the data format.
+        """
+        return Path(f"{path}.{self.config.data_format}")
+
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         """
         Return Data Ingestion configuration.
@@ -65,7 +78,10 @@ class ConfigurationManager:
             local_data_file=config.local_data_file,
             status_file=config.status_file,
             status_message_file=config.status_message_file,
-            all_schema=schema
+            all_schema=schema,
+            constraints=self.schema.get("CONSTRAINTS", {}),
+            chunk_size=config.chunk_size,
+            sample_rows=config.sample_rows
         )
         return data_validation_config
     
@@ -81,12 +97,18 @@ class ConfigurationManager:
         data_transformation_config = DataTransformationConfig(
             root_dir=config.root_dir,
             local_data_file=config.local_data_file,
-            filtered_data_file=config.filtered_data_file,
-            encoded_data_file=config.encoded_data_file,
+            filtered_data_file=self.get_data_file(config.filtered_data_file),
+            encoded_data_file=self.get_data_file(config.encoded_data_file),
+            train_data_file=self.get_data_file(config.train_data_file),
+            test_data_file=self.get_data_file(config.test_data_file),
             encoder_file=config.encoder_file,
+            encoding_table_file=config.encoding_table_file,
+            step_report_file=config.step_report_file,
+            execution_mode=config.execution_mode,
             schema=schema,
             target_column=target_column,
-            params=params
+            params=params,
+            memory_map=self.config.memory_map
         )
         return data_transformation_config
     
@@ -100,11 +122,15 @@ class ConfigurationManager:
         create_directory([config.root_dir])
         model_trainer = ModelTrainerConfig(
             root_dir=config.root_dir,
-            train_data_path=config.train_data_path,
-            test_data_path=config.test_data_path,
+            train_data_path=self.get_data_file(config.train_data_path),
+            test_data_path=self.get_data_file(config.test_data_path),
             model_name=config.model_name,
             params=params,
-            target_column=target_column.name
+            target_column=target_column.name,
+            max_workers=config.max_workers,
+            memory_map=self.config.memory_map,
+            model_formats=list(config.model_formats),
+            format_load_repeats=config.format_load_repeats
         )
         return model_trainer
     
@@ -116,10 +142,13 @@ class ConfigurationManager:
         create_directory([config.root_dir])
         model_evaluation_config = ModelEvaluationConfig(
             root_dir = config.root_dir,
-            test_data_path = config.test_data_path,
+            test_data_path = self.get_data_file(config.test_data_path),
             model_path = config.model_path,
             target_column = self.schema.TARGET_COLUMN.name,
-            metric_file_name = config.metric_file_name
+            metric_file_name = config.metric_file_name,
+            decision_threshold_file = config.decision_threshold_file,
+            threshold_beta = self.params.decision_threshold.beta,
+            memory_map = self.config.memory_map
         )
         return model_evaluation_config
     
@@ -136,11 +165,105 @@ class ConfigurationManager:
         model_predictor_config = ModelPredictionConfig(
             root_dir = config.root_dir,
             encoder_file = transformation_config.encoder_file,
+            encoding_table_file = transformation_config.encoding_table_file,
+            decision_threshold_file = self.config.model_evaluation.decision_threshold_file,
+            default_threshold = config.default_threshold,
             status_file = config.status_file,
+            audit_validation_status = config.audit_validation_status,
             model_path = config.model_path,
-            schema = schema
+            model_format = config.model_format,
+            safe_model_formats_only = config.safe_model_formats_only,
+            prefer_shared_memory = config.prefer_shared_memory,
+            schema = schema,
+            constraints = self.schema.get("CONSTRAINTS", {}),
+            target_column = self.schema.TARGET_COLUMN.name,
+            batch_chunk_size = config.batch_chunk_size,
+            unseen_category_policy = config.unseen_category_policy,
+            unseen_fallback_code = config.unseen_fallback_code,
+            hot_reload = config.hot_reload,
+            reload_interval_s = config.reload_interval_s,
+            reload_settle_s = config.reload_settle_s,
+            micro_batching = config.micro_batching,
+            micro_batch_max_wait_ms = config.micro_batch_max_wait_ms,
+            micro_batch_max_rows = config.micro_batch_max_rows
         )
         return model_predictor_config
-    
-    
 
+    def get_prediction_cache_config(self) -> PredictionCacheConfig:
+        """
+        Return the Prediction Cache config
+        """
+        config = self.config.prediction_cache
+        prediction_cache_config = PredictionCacheConfig(
+            enabled = config.enabled,
+            max_entries = config.max_entries,
+            ttl_s = config.ttl_s,
+            max_batch_records = config.max_batch_records
+        )
+        return prediction_cache_config
+
+    def get_bulk_prediction_config(self) -> BulkPredictionConfig:
+        """
+        Return the Bulk Prediction config
+        """
+        config = self.config.bulk_prediction
+        create_directory([config.root_dir])
+
+        bulk_prediction_config = BulkPredictionConfig(
+            root_dir = config.root_dir,
+            input_file = config.input_file,
+            output_file = config.output_file,
+            output_format = config.output_format,
+            id_column = config.id_column,
+            chunk_size = config.chunk_size,
+            max_workers = config.max_workers
+        )
+        return bulk_prediction_config
+
+    def get_training_jobs_config(self) -> TrainingJobsConfig:
+        """
+        Return the Training Jobs config
+        """
+        config = self.config.training_jobs
+        training_jobs_config = TrainingJobsConfig(
+            command = list(config.command),
+            max_concurrent_jobs = config.max_concurrent_jobs,
+            max_queued_jobs = config.max_queued_jobs,
+            max_log_lines = config.max_log_lines,
+            max_job_history = config.max_job_history
+        )
+        return training_jobs_config
+
+    def get_serving_config(self) -> ServingConfig:
+        """
+        Return the Serving config
+        """
+        config = self.config.serving
+        serving_config = ServingConfig(
+            app = config.app,
+            bind = config.bind,
+            workers = config.workers,
+            threads = config.threads,
+            preload = config.preload,
+            timeout = config.timeout,
+            graceful_timeout = config.graceful_timeout,
+            keepalive = config.keepalive,
+            max_requests = config.max_requests
+        )
+        return serving_config
+
+    def get_inference_service_config(self) -> InferenceServiceConfig:
+        """
+        Return the Inference Service config
+        """
+        config = self.config.inference_service
+        inference_service_config = InferenceServiceConfig(
+            host = config.host,
+            port = config.port,
+            workers = config.workers,
+            max_pending = config.max_pending,
+            max_records = config.max_records,
+            queue_timeout_s = config.queue_timeout_s,
+            shutdown_timeout_s = config.shutdown_timeout_s
+        )
+        return inference_service_config
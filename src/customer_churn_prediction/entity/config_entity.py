@@ -29,6 +29,9 @@ class DataValidationConfig:
     status_file: str
     status_message_file: str
     all_schema: dict
+    constraints: dict
+    chunk_size: int
+    sample_rows: int
 
 
 @dataclass(frozen=True)
@@ -40,10 +43,16 @@ class DataTransformationConfig:
     local_data_file: Path
     filtered_data_file: Path
     encoded_data_file: Path
+    train_data_file: Path
+    test_data_file: Path
     encoder_file: Path
+    encoding_table_file: Path
+    step_report_file: Path
+    execution_mode: str
     schema: dict
     target_column: dict
     params: dict
+    memory_map: bool
 
 
 @dataclass(frozen=True)
@@ -57,6 +66,10 @@ class ModelTrainerConfig:
     model_name: str
     params: dict
     target_column: str
+    max_workers: int
+    memory_map: bool
+    model_formats: list
+    format_load_repeats: int
 
 @dataclass(frozen=True)
 class ModelEvaluationConfig:
@@ -68,6 +81,9 @@ class ModelEvaluationConfig:
     model_path: Path
     target_column: str
     metric_file_name: Path
+    decision_threshold_file: Path
+    threshold_beta: float
+    memory_map: bool
 
 @dataclass(frozen=True)
 class ModelPredictionConfig:
@@ -76,6 +92,91 @@ class ModelPredictionConfig:
     """
     root_dir: Path
     encoder_file: Path
+    encoding_table_file: Path
+    decision_threshold_file: Path
+    default_threshold: float
     status_file: Path
+    audit_validation_status: bool
     model_path: Path
+    model_format: str
+    safe_model_formats_only: bool
+    prefer_shared_memory: bool
     schema: dict
+    constraints: dict
+    target_column: str
+    batch_chunk_size: int
+    unseen_category_policy: str
+    unseen_fallback_code: int
+    hot_reload: bool
+    reload_interval_s: float
+    reload_settle_s: float
+    micro_batching: bool
+    micro_batch_max_wait_ms: float
+    micro_batch_max_rows: int
+
+
+@dataclass(frozen=True)
+class PredictionCacheConfig:
+    """
+    Storing configuration related to the cache of the predicted records.
+    """
+    enabled: bool
+    max_entries: int
+    ttl_s: float
+    max_batch_records: int
+
+
+@dataclass(frozen=True)
+class BulkPredictionConfig:
+    """
+    Storing configuration related to the bulk prediction.
+    """
+    root_dir: Path
+    input_file: Path
+    output_file: Path
+    output_format: str
+    id_column: str
+    chunk_size: int
+    max_workers: int
+
+
+@dataclass(frozen=True)
+class TrainingJobsConfig:
+    """
+    Storing configuration related to the background training jobs.
+    """
+    command: list
+    max_concurrent_jobs: int
+    max_queued_jobs: int
+    max_log_lines: int
+    max_job_history: int
+
+
+@dataclass(frozen=True)
+class ServingConfig:
+    """
+    Storing configuration related to the production server.
+    """
+    app: str
+    bind: str
+    workers: int
+    threads: int
+    preload: bool
+    timeout: int
+    graceful_timeout: int
+    keepalive: int
+    max_requests: int
+
+
+@dataclass(frozen=True)
+class InferenceServiceConfig:
+    """
+    Storing configuration related to the asynchronous json inference service.
+    """
+    host: str
+    port: int
+    workers: int
+    max_pending: int
+    max_records: int
+    queue_timeout_s: float
+    shutdown_timeout_s: float
@@ -0,0 +1,182 @@
+"""
+Module runs all the training stages in a single process.
+
+Datasets and the selected model are passed between the stages in memory, the
+artifacts are still written for DVC. A stage is skipped when the content hash of
+its inputs is unchanged since its last run and its outputs are untouched.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.components.data_ingestion import DataIngestion
+from customer_churn_prediction.components.data_transformation import DataTransformation
+from customer_churn_prediction.components.data_validation import DataValidation
+from customer_churn_prediction.components.model_evaluation import ModelEvaluation
+from customer_churn_prediction.components.model_store import ModelStore
+from customer_churn_prediction.components.model_trainer import ModelTrainer
+from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.utils.common import get_file_hash, load_json, save_json
+from customer_churn_prediction.utils.profiling import profile_step
+
+
+class PipelineRunner:
+    """
+    Handle the run of all the training stages with the shared in-memory state.
+    """
+    def __init__(self, force=False):
+        self.force = force
+        self.config = ConfigurationManager()
+        self.state_file = Path(self.config.config.pipeline_state_file)
+        self.state = load_json(self.state_file).to_dict() if self.state_file.exists() else {}
+        self.memory = {}
+        self._file_hashes = {}
+
+    def file_hash(self, path) -> str:
+        """
+        Return the content hash of the file, the hash is computed once per file version.
+        """
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._file_hashes:
+            self._file_hashes[key] = get_file_hash(Path(path))
+        return self._file_hashes[key]
+
+    def inputs_hash(self, files, values) -> str:
+        """
+        Return the hash of the input files content and the configuration values of a stage.
+        """
+        content = {
+            "files": {str(path): self.file_hash(path) for path in files},
+            "values": values,
+        }
+        return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_unchanged(self, name, inputs_hash, outputs) -> bool:
+        """
+        Check whether the stage already ran on the same inputs and its outputs are untouched,
+        an output which is missing or has no recorded hash counts as changed.
+        """
+        stage_state = self.state.get(name)
+        if self.force or not stage_state or stage_state["inputs_hash"] != inputs_hash:
+            return False
+        for path in outputs:
+            recorded = stage_state["outputs"].get(str(path))
+            if recorded is None or self.file_hash(path) != recorded:
+                return False
+        return True
+
+    def run_stage(self, name, run, files=(), values=None, outputs=()):
+        """
+        Run the stage unless its inputs are unchanged and record its state.
+
+        Params:
+            name (str): Name of the stage
+            run (callable): Function executing the stage
+            files (list): Input files of the stage
+            values: Configuration values the stage depends on
+            outputs (list): Files written by the stage
+        """
+        inputs_hash = self.inputs_hash(files, values)
+        if self.is_unchanged(name, inputs_hash, outputs):
+            logger.info(f">>>>> Stage {name} skipped, inputs are unchanged <<<<<<")
+            return
+        logger.info(f">>>>> Stage {name} started <<<<<<")
+        with profile_step(name):
+            run()
+        self.state[name] = {
+            "inputs_hash": inputs_hash,
+            "outputs": {str(path): self.file_hash(path) for path in outputs},
+        }
+        save_json(self.state_file, self.state)
+        logger.info(f">>>>> Stage {name} Completed <<<<<<")
+
+    def run(self):
+        """
+        Run all the training stages in order.
+        """
+        config, params, schema = self.config.config, self.config.params, self.config.schema
+        ingestion_config = self.config.get_data_ingestion_config()
+        validation_config = self.config.get_data_validation_config()
+        transformation_config = self.config.get_data_transformation_config()
+        trainer_config = self.config.get_model_trainer_config()
+        evaluation_config = self.config.get_model_evaluation_config()
+        model_path = os.path.join(trainer_config.root_dir, trainer_config.model_name)
+
+        self.run_stage(
+            "Data Ingestion",
+            lambda: DataIngestion(ingestion_config).download_file(),
+            values=config.data_ingestion,
+            outputs=[ingestion_config.local_data_file],
+        )
+        self.run_stage(
+            "Data Validation",
+            lambda: DataValidation(validation_config).validate_all_columns(),
+            files=[validation_config.local_data_file],
+            values=[schema.COLUMNS, schema.get("CONSTRAINTS"), config.data_validation],
+            outputs=[validation_config.status_file, validation_config.status_message_file],
+        )
+        self.run_stage(
+            "Data Transformation",
+            lambda: self.transform_data(transformation_config, validation_config.status_file),
+            files=[transformation_config.local_data_file, validation_config.status_file],
+            values=[
+                schema, params.test_size, params.random_state, params.data_transformation,
+                config.data_transformation, config.data_format,
+            ],
+            outputs=[
+                transformation_config.train_data_file,
+                transformation_config.test_data_file,
+                transformation_config.encoder_file,
+                transformation_config.encoding_table_file,
+            ],
+        )
+        self.run_stage(
+            "Model Training and Selection",
+            lambda: self.train_model(trainer_config),
+            files=[trainer_config.train_data_path, trainer_config.test_data_path],
+            values=[params.models, params.model_search, params.random_state, config.model_trainer.model_formats],
+            outputs=[model_path, ModelStore(Path(model_path)).manifest_path],
+        )
+        self.run_stage(
+            "Model Evaluation",
+            lambda: self.evaluate_model(evaluation_config),
+            files=[evaluation_config.model_path, evaluation_config.test_data_path],
+            values=params.decision_threshold,
+            outputs=[evaluation_config.metric_file_name, evaluation_config.decision_threshold_file],
+        )
+
+    def transform_data(self, transformation_config, status_file):
+        """
+        Transform the data in memory and keep the training and test sets.
+        """
+        with open(status_file, 'r') as f:
+            status_file_data = f.read()
+            logger.info(f"Status file: {status_file} data is {status_file_data}")
+            status = status_file_data.split(" ")[-1].strip()
+        if status != "True":
+            raise Exception("Your data schema is not validated")
+        data_transformation = DataTransformation(transformation_config)
+        train, test, _ = data_transformation.transform_in_memory(encoding='label_encoding')
+        self.memory.update(train=train, test=test)
+
+    def train_model(self, trainer_config):
+        """
+        Train the models on the in-memory datasets and keep the selected model.
+        """
+        model_trainer = ModelTrainer(trainer_config)
+        model, _, _ = model_trainer.train_and_select_best_model(
+            self.memory.get("train"), self.memory.get("test"))
+        self.memory["model"] = model
+
+    def evaluate_model(self, evaluation_config):
+        """
+        Evaluate the in-memory model on the in-memory test set.
+        """
+        model_evaluation = ModelEvaluation(evaluation_config)
+        model_evaluation.save_result(self.memory.get("model"), self.memory.get("test"))
@@ -5,6 +5,7 @@ Module Handles and execute the data ingestion pipeline
 from customer_churn_prediction import logger
 from customer_churn_prediction.config.configuration import ConfigurationManager
 from customer_churn_prediction.components.data_ingestion import DataIngestion
+from customer_churn_prediction.utils.profiling import profile_from_env
 
 class DataIngestionPipeline:
     """
@@ -28,4 +29,5 @@ class DataIngestionPipeline:
             raise
 
 if __name__ == "__main__":
-    DataIngestionPipeline().main()
+    with profile_from_env("Data Ingestion"):
+        DataIngestionPipeline().main()
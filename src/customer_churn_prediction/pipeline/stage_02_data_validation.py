@@ -5,6 +5,7 @@ Module Handle and execute data validation pipeline.
 from customer_churn_prediction import logger
 from customer_churn_prediction.config.configuration import ConfigurationManager
 from customer_churn_prediction.components.data_validation import DataValidation
+from customer_churn_prediction.utils.profiling import profile_from_env
 
 class DataValidationPipeline:
     """
@@ -28,4 +29,5 @@ class DataValidationPipeline:
             )
 
 if __name__ == "__main__":
-    DataValidationPipeline().main()
\ No newline at end of file
+    with profile_from_env("Data Validation"):
+        DataValidationPipeline().main()
\ No newline at end of file
@@ -9,6 +9,7 @@ from customer_churn_prediction.config.configuration import (
 from customer_churn_prediction.components.data_transformation import (
     DataTransformation
 )
+from customer_churn_prediction.utils.profiling import profile_from_env
 
 class DataTransformationPipeline:
     """
@@ -29,15 +30,18 @@ class DataTransformationPipeline:
             with open(status_file,'r') as f:
                 status_file_data = f.read()
                 logger.info(f"Status file: {status_file} data is {status_file_data}")
-                status = status_file_data.split(" ")[-1]
-            if status:
+                status = status_file_data.split(" ")[-1].strip()
+            if status == "True":
                 data_transformation_config = config.get_data_transformation_config()
                 data_transformation = DataTransformation(data_transformation_config)
-                data_transformation.filter_dataset()
-                data_transformation.drop_duplicates()
-                data_transformation.categorical_column_encoder(encoding='label_encoding')
-                data_transformation.train_test_splitting()
-                data_transformation.manage_inbalanced_data()
+                if data_transformation_config.execution_mode == "fused":
+                    data_transformation.transform_in_memory(encoding='label_encoding')
+                else:
+                    data_transformation.filter_dataset()
+                    data_transformation.drop_duplicates()
+                    data_transformation.categorical_column_encoder(encoding='label_encoding')
+                    data_transformation.train_test_splitting()
+                    data_transformation.manage_inbalanced_data()
             else:
                 raise Exception("Your data schema is not validated")
         except Exception:
@@ -46,4 +50,5 @@ class DataTransformationPipeline:
             )
 
 if __name__ == "__main__":
-    DataTransformationPipeline().main()
\ No newline at end of file
+    with profile_from_env("Data Transformation"):
+        DataTransformationPipeline().main()
\ No newline at end of file
@@ -5,6 +5,7 @@ Module handle and execute model training pipeline.
 from customer_churn_prediction import logger
 from customer_churn_prediction.config.configuration import ConfigurationManager
 from customer_churn_prediction.components.model_trainer import ModelTrainer
+from customer_churn_prediction.utils.profiling import profile_from_env
 
 class ModelTrainingPipeline:
     """
@@ -28,4 +29,5 @@ class ModelTrainingPipeline:
             raise
 
 if __name__ == "__main__":
-    ModelTrainingPipeline().main()
\ No newline at end of file
+    with profile_from_env("Model Training"):
+        ModelTrainingPipeline().main()
\ No newline at end of file
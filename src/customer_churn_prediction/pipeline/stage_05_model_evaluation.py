@@ -5,6 +5,7 @@ Module handle and execute model evaluation pipeline
 from customer_churn_prediction import logger
 from customer_churn_prediction.config.configuration import ConfigurationManager
 from customer_churn_prediction.components.model_evaluation import ModelEvaluation
+from customer_churn_prediction.utils.profiling import profile_from_env
 
 class ModelEvaluationPipeline:
     """
@@ -28,4 +29,5 @@ class ModelEvaluationPipeline:
             raise
 
 if __name__ == "__main__":
-    ModelEvaluationPipeline().main()
\ No newline at end of file
+    with profile_from_env("Model Evaluation"):
+        ModelEvaluationPipeline().main()
\ No newline at end of file
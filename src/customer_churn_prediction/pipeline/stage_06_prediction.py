@@ -1,9 +1,80 @@
 """
 Module handles the prediction pipeline.
 """
+import threading
+from functools import lru_cache, wraps
+
 from customer_churn_prediction import logger
 from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.components.micro_batcher import MicroBatcher
 from customer_churn_prediction.components.model_prediction import ModelPrediction
+from customer_churn_prediction.components.prediction_cache import PredictionCache
+from customer_churn_prediction.components.predictor_registry import PredictorRegistry
+
+# guards the first call of the process wide getters, the request threads may all call them at once
+_singletons_lock = threading.RLock()
+
+
+def process_singleton(function):
+    """
+    Cache the object built by the function once per process.
+
+    lru_cache alone lets the concurrent first calls each build their own object, the
+    first call is therefore made under the lock and the later calls only read the cache.
+    The lock is reentrant, as the getters build the objects they depend on.
+    """
+    cached = lru_cache(maxsize=None)(function)
+
+    @wraps(function)
+    def wrapper():
+        if cached.cache_info().currsize:
+            return cached()
+        with _singletons_lock:
+            return cached()
+
+    wrapper.cache_clear = cached.cache_clear
+    wrapper.cache_info = cached.cache_info
+    return wrapper
+
+
+@process_singleton
+def get_predictor_registry() -> PredictorRegistry:
+    """
+    Return the process wide predictor registry, configuration is read only once per process.
+
+    With hot reload the watcher of the artifact files is started along with the registry.
+    """
+    config = ConfigurationManager()
+    data_prediction_config = config.get_prediction_config()
+    registry = PredictorRegistry(data_prediction_config)
+    if data_prediction_config.hot_reload:
+        registry.start_watcher()
+    return registry
+
+
+@process_singleton
+def get_prediction_cache() -> PredictionCache:
+    """
+    Return the process wide cache of the predicted records, None if it is disabled.
+
+    The cache is flushed by the registry whenever the model or the encoders are reloaded.
+    """
+    cache_config = ConfigurationManager().get_prediction_cache_config()
+    if not cache_config.enabled:
+        return None
+    cache = PredictionCache(cache_config)
+    get_predictor_registry().add_listener(cache.clear)
+    return cache
+
+
+@process_singleton
+def get_micro_batcher() -> MicroBatcher:
+    """
+    Return the process wide micro batcher, the concurrent requests of the process are predicted together.
+    """
+    registry = get_predictor_registry()
+    return MicroBatcher(registry.config, registry, get_prediction_cache())
+
 
 class PredictionPipeline:
     """
@@ -11,13 +82,11 @@ class PredictionPipeline:
     """
 
     def __init__(self):
-        pass
+        self.registry = get_predictor_registry()
 
     def main(self):
         try:
-            config = ConfigurationManager()
-            data_prediction_config = config.get_prediction_config()
-            model_prediction = ModelPrediction(data_prediction_config)
+            model_prediction = ModelPrediction(self.registry.config, self.registry, get_prediction_cache())
         except Exception:
             logger.exception(
                 f"Exception occured while executing the model evaluation pipeline")
@@ -26,14 +95,36 @@ class PredictionPipeline:
             return model_prediction
 
     def predict(self,data):
+        status, prediction, probability, msg, versions = False, None, None, "Something went wrong", {}
         try:
-            model = self.main()
-            status, prediction, msg = model.predict(data)
+            # the single record requests go through the micro batcher, which falls back to ModelPrediction when disabled
+            status, prediction, probability, msg, versions = get_micro_batcher().predict(data)
         except Exception:
             logger.exception(
                 f"Exception occured while predicting")
-        return status, prediction, msg
-             
+        return status, prediction, probability, msg, versions
+
+    def predict_batch(self, data, chunk_size=None, top_k=None):
+        """
+        Predict the churn of all the passed records, with top_k the riskiest records are ranked.
+
+        Returns:
+            status (bool): Whether prediction is successfull.
+            results (pd.DataFrame): Per record prediction and validation errors or None
+            msg (str): Prediction message
+        """
+        status, results, msg = False, None, "Something went wrong"
+        try:
+            model = self.main()
+            results = model.predict_batch(data, chunk_size, top_k)
+            status, msg = True, "Batch prediction done successfully"
+        except FileNotFoundError as e:
+            msg = str(e)
+        except Exception:
+            logger.exception(
+                f"Exception occured while predicting the batch")
+        return status, results, msg
+
 
 if __name__ == "__main__":
-    PredictionPipeline().predict()
\ No newline at end of file
+    PredictionPipeline().predict()
@@ -0,0 +1,57 @@
+"""
+Module handles the bulk prediction pipeline, it scores large CSV/Parquet files in chunks.
+
+Usage:
+    python -m customer_churn_prediction.pipeline.stage_07_bulk_prediction \
+        --input customers.parquet --output predictions.parquet --format parquet
+"""
+
+import argparse
+from dataclasses import replace
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.components.bulk_prediction import BulkPrediction
+from customer_churn_prediction.components.model_prediction import ModelPrediction
+
+
+class BulkPredictionPipeline:
+    """
+    Handle the bulk prediction pipeline.
+    """
+    def __init__(self):
+        pass
+
+    def main(self, **overrides):
+        """
+        Execute the bulk prediction pipeline.
+
+        Params:
+            overrides: Bulk prediction config values to use instead of config.yaml
+        """
+        try:
+            config = ConfigurationManager()
+            bulk_prediction_config = config.get_bulk_prediction_config()
+            overrides = {key: value for key, value in overrides.items() if value is not None}
+            bulk_prediction_config = replace(bulk_prediction_config, **overrides)
+            model_prediction = ModelPrediction(config.get_prediction_config())
+            bulk_prediction = BulkPrediction(bulk_prediction_config, model_prediction)
+            return bulk_prediction.predict()
+        except Exception:
+            logger.exception(
+                f"Exception occured while executing the bulk prediction pipeline")
+            raise
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Predict the churn of the customers in a CSV/Parquet file.")
+    parser.add_argument("--input", dest="input_file", help="CSV or Parquet file to predict")
+    parser.add_argument("--output", dest="output_file", help="File to write the predictions")
+    parser.add_argument("--format", dest="output_format", choices=["csv", "parquet"], help="Output file format")
+    parser.add_argument("--chunk-size", dest="chunk_size", type=int, help="Records read and predicted at a time")
+    parser.add_argument("--workers", dest="max_workers", type=int, help="Chunks predicted in parallel")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    BulkPredictionPipeline().main(**vars(parse_args()))
@@ -0,0 +1,4 @@
+from customer_churn_prediction.serving.server import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Asynchronous json inference service for the machine clients, served along with the flask app.
+
+The records are parsed and checked against the json schema generated from schema.yaml on
+the event loop, the model runs on a bounded pool of threads. Requests beyond max_pending
+are rejected with 503 at once instead of queuing, so the latency of the accepted requests
+stays bounded under load.
+
+Usage:
+    python -m customer_churn_prediction.serving.inference_service --port 8081
+
+    curl -X POST localhost:8081/v1/predict -H 'Content-Type: application/json' \
+        -d '{"records": [{"gender": "Male", "SeniorCitizen": 0, ...}]}'
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from aiohttp import web
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.components.model_prediction import ModelPrediction
+from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.entity.config_entity import InferenceServiceConfig
+from customer_churn_prediction.pipeline.stage_06_prediction import get_prediction_cache, get_predictor_registry
+from customer_churn_prediction.utils import metrics
+
+# upper bound of the json size of a record, used to limit the request body
+MAX_RECORD_BYTES = 2048
+RETRY_AFTER_S = "1"
+SERVICE = web.AppKey("service", "InferenceService")
+
+
+class Overloaded(Exception):
+    """
+    Raised when the request can not be queued for the model workers.
+    """
+
+
+class InferenceService:
+    """
+    Validates the json records and predicts them on the bounded pool of model workers.
+
+    At most workers requests run on the model at a time, at most max_pending requests
+    are queued or running, a request waiting longer than queue_timeout_s is rejected.
+    """
+    def __init__(self, config: InferenceServiceConfig, registry=None, cache=None):
+        self.config = config
+        self.registry = registry if registry is not None else get_predictor_registry()
+        self.cache = cache if cache is not None else get_prediction_cache()
+        self.validator = self.registry.validator
+        self.executor = ThreadPoolExecutor(max_workers=config.workers, thread_name_prefix="inference")
+        self.pending = 0
+        self._slots = None
+
+    def parse_records(self, payload) -> list:
+        """
+        Return the records of the payload, a single record or an object holding the list of records.
+
+        Raises:
+            web.HTTPException: If the payload is not a record or a list of records
+        """
+        records = payload.get("records", payload) if isinstance(payload, dict) else payload
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+            raise json_error(web.HTTPBadRequest, "Body must be a record or an object with a non-empty list of records")
+        if len(records) > self.config.max_records:
+            raise json_error(
+                web.HTTPRequestEntityTooLarge,
+                f"At most {self.config.max_records} records are predicted per request, got {len(records)}",
+                max_size=self.config.max_records, actual_size=len(records))
+        errors = [
+            {"record": position, "field": column, "message": message}
+            for position, record in enumerate(records)
+            for column, message in self.validator.check_record(record)
+        ]
+        if errors:
+            raise json_error(web.HTTPUnprocessableEntity, "Records do not match the schema", errors=errors)
+        return records
+
+    def predict(self, records: list) -> dict:
+        """
+        Predict the validated records, runs on the model workers.
+        """
+        data = pd.DataFrame.from_records(records, columns=list(self.validator.columns))
+        results = ModelPrediction(self.registry.config, self.registry, self.cache).predict_batch(data)
+        results["churn_probability"] = results["churn_probability"].astype(object).where(
+            results["churn_probability"].notna(), None)
+        predictions = results.astype(object).where(results.notna(), None).to_dict(orient="records")
+        for prediction in predictions:
+            if prediction["error"] is None:
+                del prediction["error"]
+        return {
+            "model_version": results.attrs["model_version"],
+            "encoder_version": results.attrs["encoder_version"],
+            "threshold": results.attrs["threshold"],
+            "predictions": predictions,
+        }
+
+    async def submit(self, records: list) -> dict:
+        """
+        Run the prediction on a model worker once one is free.
+
+        Raises:
+            Overloaded: If max_pending requests are already pending or no worker was free in time
+        """
+        if self.pending >= self.config.max_pending:
+            raise Overloaded(f"{self.pending} requests are already pending")
+        self.pending += 1
+        metrics.PENDING_REQUESTS.inc()
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.config.queue_timeout_s)
+            except asyncio.TimeoutError:
+                raise Overloaded(f"No model worker was free for {self.config.queue_timeout_s} seconds")
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, self.predict, records)
+            finally:
+                self._slots.release()
+        finally:
+            self.pending -= 1
+            metrics.PENDING_REQUESTS.dec()
+
+    async def handle_predict(self, request: web.Request) -> web.Response:
+        try:
+            payload = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise json_error(web.HTTPBadRequest, f"Body is not valid json: {e}")
+        records = self.parse_records(payload)
+        try:
+            body = await self.submit(records)
+        except Overloaded as e:
+            raise json_error(web.HTTPServiceUnavailable, f"Service is overloaded: {e}", headers={"Retry-After": RETRY_AFTER_S})
+        except FileNotFoundError as e:
+            raise json_error(web.HTTPServiceUnavailable, str(e))
+        return web.json_response(body)
+
+    async def handle_schema(self, request: web.Request) -> web.Response:
+        return web.json_response(self.validator.json_schema())
+
+    async def handle_ready(self, request: web.Request) -> web.Response:
+        if not self.registry.is_ready:
+            return web.json_response({"ready": False, "message": "Prediction artifacts are not loaded yet"}, status=503)
+        return web.json_response({"ready": True, **self.registry.get().versions})
+
+    async def handle_cache_stats(self, request: web.Request) -> web.Response:
+        if self.cache is None:
+            return web.json_response({"enabled": False})
+        return web.json_response({"enabled": True, **self.cache.stats()})
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=metrics.REGISTRY.render().encode(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+    async def on_startup(self, app: web.Application):
+        self._slots = asyncio.Semaphore(self.config.workers)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.registry.warm_up)
+        logger.info(
+            f"Inference service started with {self.config.workers} model workers, "
+            f"predictor ready: {self.registry.is_ready}")
+
+    async def on_cleanup(self, app: web.Application):
+        self.registry.stop_watcher()
+        self.executor.shutdown(wait=True)
+
+
+def json_error(error_class, message: str, errors: list = None, headers: dict = None, **error_args):
+    """
+    Return the http error of the class with a json body.
+    """
+    body = {"message": message} if errors is None else {"message": message, "errors": errors}
+    return error_class(text=json.dumps(body), content_type="application/json", headers=headers, **error_args)
+
+
+@web.middleware
+async def record_request(request: web.Request, handler):
+    """
+    Count the requests and measure their latency per route.
+    """
+    start = time.perf_counter()
+    resource = request.match_info.route.resource
+    # requests not matching any route are grouped, so unknown paths do not add label values
+    route = resource.canonical if resource is not None else "unmatched"
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.REQUEST_LATENCY.labels(route=route).observe(time.perf_counter() - start)
+        metrics.REQUESTS.labels(route=route, method=request.method, status=status).inc()
+
+
+def create_app(config: InferenceServiceConfig = None) -> web.Application:
+    """
+    Create the aiohttp application of the inference service.
+    """
+    config = config or ConfigurationManager().get_inference_service_config()
+    service = InferenceService(config)
+    app = web.Application(middlewares=[record_request], client_max_size=config.max_records * MAX_RECORD_BYTES)
+    app.add_routes([
+        web.post("/v1/predict", service.handle_predict),
+        web.get("/v1/schema", service.handle_schema),
+        web.get("/v1/cache/stats", service.handle_cache_stats),
+        web.get("/ready", service.handle_ready),
+        web.get("/metrics", service.handle_metrics),
+    ])
+    app.on_startup.append(service.on_startup)
+    app.on_cleanup.append(service.on_cleanup)
+    app[SERVICE] = service
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", help="Host of the service, the inference_service config by default")
+    parser.add_argument("--port", type=int, help="Port of the service, the inference_service config by default")
+    parser.add_argument("--workers", type=int, help="Model worker threads, the inference_service config by default")
+    args = parser.parse_args(argv)
+
+    config = ConfigurationManager().get_inference_service_config()
+    overrides = {key: value for key, value in vars(args).items() if value is not None}
+    config = InferenceServiceConfig(**{**vars(config), **overrides})
+    web.run_app(create_app(config), host=config.host, port=config.port, shutdown_timeout=config.shutdown_timeout_s)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Production server of the prediction app, the flask app is served by gunicorn workers.
+
+With preload the app and the prediction artifacts are loaded once in the master process
+before the workers are forked, so the workers share the memory of the model copy-on-write
+and serve the first request warm. The artifact watcher runs in every worker, not in the
+master. On SIGTERM the workers finish the in-flight requests within graceful_timeout.
+
+The training jobs, the metrics and the prediction cache are kept in the memory of every
+worker process, so one worker is served by default. With more workers a job started
+by one worker is not known to the others and /metrics reports the worker answering it.
+
+Usage:
+    python -m customer_churn_prediction.serving --threads 8
+"""
+
+import argparse
+import gc
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+
+from customer_churn_prediction import logger
+from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.entity.config_entity import ServingConfig
+from customer_churn_prediction.pipeline.stage_06_prediction import get_micro_batcher, get_predictor_registry
+
+
+def when_ready(server):
+    """
+    Master process hook, called before the workers are forked.
+    """
+    registry = get_predictor_registry()
+    # the master does not serve, the workers watch the artifacts
+    registry.stop_watcher()
+    if server.cfg.preload_app:
+        # keep the garbage collector of the workers from writing to the preloaded objects
+        gc.freeze()
+    logger.info(f"Serving on {server.cfg.bind} with {server.cfg.workers} workers, predictor ready: {registry.is_ready}")
+    if server.cfg.workers > 1:
+        logger.warning(
+            f"Training jobs, /metrics and /cache/stats are per worker process, with {server.cfg.workers} workers "
+            f"/train/<job_id> may return 404 and the counters depend on the worker answering")
+
+
+def post_worker_init(worker):
+    """
+    Worker process hook, called before the worker accepts the requests.
+    """
+    registry = get_predictor_registry()
+    if not registry.is_ready:
+        registry.warm_up()
+    if registry.config.hot_reload:
+        registry.start_watcher()
+    # the micro batcher and the prediction cache are built before the first requests race for them
+    get_micro_batcher()
+
+
+def worker_exit(server, worker):
+    """
+    Worker process hook, called when the worker is shut down.
+    """
+    get_predictor_registry().stop_watcher()
+
+
+class ChurnServer(BaseApplication):
+    """
+    Gunicorn application loading the flask app with the options of the serving config.
+    """
+    def __init__(self, config: ServingConfig):
+        self.config = config
+        super().__init__()
+
+    def load_config(self):
+        options = {
+            "bind": self.config.bind,
+            "workers": self.config.workers,
+            "threads": self.config.threads,
+            "preload_app": self.config.preload,
+            "timeout": self.config.timeout,
+            "graceful_timeout": self.config.graceful_timeout,
+            "keepalive": self.config.keepalive,
+            "max_requests": self.config.max_requests,
+            "when_ready": when_ready,
+            "post_worker_init": post_worker_init,
+            "worker_exit": worker_exit,
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        app = import_app(self.config.app)
+        get_predictor_registry().warm_up()
+        return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bind", help="Address of the server, the serving config by default")
+    parser.add_argument("--workers", type=int, help="Worker processes, the serving config by default")
+    parser.add_argument("--threads", type=int, help="Threads per worker, the serving config by default")
+    args = parser.parse_args(argv)
+
+    config = ConfigurationManager().get_serving_config()
+    overrides = {key: value for key, value in vars(args).items() if value is not None}
+    ChurnServer(ServingConfig(**{**vars(config), **overrides})).run()
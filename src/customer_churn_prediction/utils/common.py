@@ -2,12 +2,14 @@
 Contains utility functions
 """
 
+import hashlib
 import json
 import os
 from pathlib import Path
 from typing import Any
 
 import joblib
+import pandas as pd
 import yaml
 from box import ConfigBox
 from box.exceptions import BoxValueError
@@ -108,6 +110,61 @@ def load_bin(path: Path) -> Any:
     logger.info(f"binary file loaded from: {path}")
     return data
 
+@ensure_annotations
+def save_data(data: pd.DataFrame, path: Path):
+    """save dataset in the format of the file extension
+
+    Args:
+        data (pd.DataFrame): dataset to be saved
+        path (Path): path of the csv, parquet or feather file
+    """
+    if path.suffix == ".parquet":
+        data.to_parquet(path, index=False)
+    elif path.suffix == ".feather":
+        data.reset_index(drop=True).to_feather(path)
+    else:
+        data.to_csv(path, index=False)
+    logger.info(f"dataset of shape {data.shape} saved at: {path}")
+
+@ensure_annotations
+def read_data(path: Path, memory_map: bool = False) -> pd.DataFrame:
+    """read dataset based on the file extension
+
+    Args:
+        path (Path): path of the csv, parquet or feather file
+        memory_map (bool,optional): memory map the file while reading. Default is false
+
+    Returns:
+        pd.DataFrame: dataset stored in the file
+    """
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, memory_map=memory_map)
+    if path.suffix == ".feather":
+        from pyarrow import feather
+
+        return feather.read_table(path, memory_map=memory_map).to_pandas()
+    return pd.read_csv(path, memory_map=memory_map)
+
+@ensure_annotations
+def read_data_chunks(path: Path, chunk_size: int):
+    """read dataset chunk by chunk based on the file extension
+
+    Args:
+        path (Path): path of the csv or parquet file
+        chunk_size (int): number of rows in a chunk
+
+    Yields:
+        pd.DataFrame: rows of the dataset
+    """
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
 @ensure_annotations
 def get_size(path:Path)->str:
     """
@@ -121,3 +178,21 @@ def get_size(path:Path)->str:
     """
     size_in_kb = round(os.path.getsize(path)/1024)
     return f"~{size_in_kb} KB"
+
+@ensure_annotations
+def get_file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    get sha256 hash of the file content
+
+    Args:
+        path(Path): path of the file
+        chunk_size(int,optional): bytes read at a time. Default is 1 MB
+
+    Returns:
+        hash(str): hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,275 @@
+"""
+Contains the in-process metrics registry exposed in the Prometheus text format.
+
+Metrics are kept per process, every serving worker reports its own values.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Metric:
+    """
+    Base of the metrics, the children hold the values of every combination of the labels.
+    """
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labelvalues):
+        """
+        Return the child of the label values, it is created on the first use.
+        """
+        if set(labelvalues) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects the labels {self.labelnames}, got {tuple(labelvalues)}")
+        key = tuple(str(labelvalues[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self):
+        """
+        Drop the values of all the label values.
+        """
+        with self._lock:
+            self._children = {} if self.labelnames else {(): self._new_child()}
+
+    def _samples(self):
+        raise NotImplementedError
+
+    @property
+    def exposed_name(self) -> str:
+        return self.name
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.exposed_name} {self.documentation}", f"# TYPE {self.exposed_name} {self.kind}"]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+    def _items(self):
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            yield dict(zip(self.labelnames, key)), child
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counter can only be increased")
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = float(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """
+        Observe the duration of the block in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value, like the number of requests.
+    """
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    @property
+    def exposed_name(self) -> str:
+        return f"{self.name}_total"
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for labels, child in self._items():
+            yield self.exposed_name, labels, child.value
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, like the requests in progress.
+    """
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def _samples(self):
+        for labels, child in self._items():
+            yield self.name, labels, child.value
+
+
+class Histogram(_Metric):
+    """
+    Distribution of the observed values in cumulative buckets, like the latencies.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        for labels, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, total
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of the process and renders them in the Prometheus text format.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Register the metric, the already registered metric of the same name is returned.
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Return all the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUESTS = REGISTRY.counter(
+    "churn_http_requests", "HTTP requests handled by the serving app", ["route", "method", "status"])
+REQUEST_LATENCY = REGISTRY.histogram(
+    "churn_http_request_duration_seconds", "Latency of the HTTP requests", ["route"])
+STAGE_LATENCY = REGISTRY.histogram(
+    "churn_prediction_stage_duration_seconds",
+    "Latency of the prediction stages: validation, encoding, inference and rendering", ["stage"])
+MODEL_LOADS = REGISTRY.counter(
+    "churn_model_loads", "Loads of the prediction artifacts by their result", ["result"])
+CACHE_LOOKUPS = REGISTRY.counter(
+    "churn_cache_lookups", "Lookups of the in-process caches by their result", ["cache", "result"])
+PREDICTIONS = REGISTRY.counter(
+    "churn_predictions", "Predicted records by their predicted class", ["prediction"])
+INVALID_RECORDS = REGISTRY.counter(
+    "churn_invalid_records", "Records rejected by the validation or the encoding")
+MODEL_INFO = REGISTRY.gauge(
+    "churn_model_info", "Versions of the served model and encoder, 1 for the served ones",
+    ["model_version", "encoder_version"])
+PENDING_REQUESTS = REGISTRY.gauge(
+    "churn_inference_pending_requests", "Requests of the inference service queued or running on the model workers")
+MICRO_BATCH_RECORDS = REGISTRY.histogram(
+    "churn_micro_batch_records", "Records predicted together by the micro batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+MICRO_BATCH_WAIT = REGISTRY.histogram(
+    "churn_micro_batch_wait_seconds", "Time the requests were buffered by the micro batcher before the prediction")
@@ -0,0 +1,196 @@
+"""
+Contains utility functions to measure the pipeline steps.
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from customer_churn_prediction import logger
+
+PROFILE_DIR_ENV = "CHURN_PROFILE_DIR"
+
+# reports of the active profiling sessions along with whether they trace the memory,
+# and the peaks of the running steps
+_sessions = []
+_peaks = []
+
+
+def _read_proc(name: str) -> dict:
+    """
+    Return the key value pairs of the /proc/self file, empty on the systems without procfs.
+    """
+    try:
+        with open(f"/proc/self/{name}") as f:
+            return dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {}
+
+
+def _peak_rss() -> int:
+    """
+    Return the peak resident memory of the process in bytes.
+
+    The peak is reset per step on Linux, elsewhere it is the peak since the process started.
+    """
+    status = _read_proc("status")
+    if "VmHWM" in status:
+        return int(status["VmHWM"].split()[0]) * 1024
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _reset_peak_rss():
+    """
+    Reset the peak resident memory of the process, supported by Linux only.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _io_bytes():
+    """
+    Return the bytes read and written by the process including the reads served from the page cache.
+    """
+    io = _read_proc("io")
+    return int(io.get("rchar", 0)), int(io.get("wchar", 0))
+
+
+def _current_peaks():
+    return tracemalloc.get_traced_memory()[1], _peak_rss()
+
+
+@contextmanager
+def track_step(name: str, report: list = None):
+    """
+    Measure the wall time, CPU time, peak memory and IO of the step.
+
+    Memory is measured as the peak resident memory of the process, and traced with
+    tracemalloc, which also traces the numpy and pandas buffers, when one of the active
+    profiling sessions traces the memory. CPU time includes the worker processes
+    finished during the step. Steps can be nested, the step is added to the report and
+    to all the active profiling sessions in the order they are started.
+
+    Args:
+        name (str): name of the step
+        report (list,optional): list where the measurement of the step is appended
+    """
+    step = {"step": name, "depth": len(_peaks)}
+    targets = ([report] if report is not None else []) + [session for session, _ in _sessions]
+    for target in {id(target): target for target in targets}.values():
+        target.append(step)
+
+    is_tracing = tracemalloc.is_tracing()
+    trace_memory = is_tracing or any(traced for _, traced in _sessions)
+    if not is_tracing and trace_memory:
+        tracemalloc.start()
+    if _peaks:
+        _peaks[-1] = tuple(map(max, _peaks[-1], _current_peaks()))
+    if trace_memory:
+        tracemalloc.reset_peak()
+    _reset_peak_rss()
+    _peaks.append((0, 0))
+    start_memory, _ = tracemalloc.get_traced_memory()
+    start_read, start_written = _io_bytes()
+    start_times = os.times()
+    start_time = time.perf_counter()
+    try:
+        yield step
+    finally:
+        wall_time = time.perf_counter() - start_time
+        end_times = os.times()
+        end_read, end_written = _io_bytes()
+        peak_memory, peak_rss = map(max, _peaks.pop(), _current_peaks())
+        if _peaks:
+            _peaks[-1] = tuple(map(max, _peaks[-1], (peak_memory, peak_rss)))
+        if not is_tracing and trace_memory:
+            tracemalloc.stop()
+        cpu_time = sum(end_times[:4]) - sum(start_times[:4])
+        step.update({
+            "wall_time_s": round(wall_time, 4),
+            "cpu_time_s": round(cpu_time, 4),
+            "peak_memory_mb": round((peak_memory - start_memory) / 1024 ** 2, 3) if trace_memory else None,
+            "peak_rss_mb": round(peak_rss / 1024 ** 2, 3),
+            "read_mb": round((end_read - start_read) / 1024 ** 2, 3),
+            "written_mb": round((end_written - start_written) / 1024 ** 2, 3),
+        })
+        logger.info(
+            f"Step {name} took {step['wall_time_s']}s, cpu {step['cpu_time_s']}s, "
+            f"peak memory {step['peak_memory_mb']} MB, peak rss {step['peak_rss_mb']} MB, "
+            f"read {step['read_mb']} MB, written {step['written_mb']} MB"
+        )
+
+
+def profile_step(name: str):
+    """
+    Return the context measuring the step when a profiling session is active, otherwise a no-op.
+    """
+    return track_step(name) if _sessions else nullcontext()
+
+
+def profiled(func):
+    """
+    Decorator measuring every call of the function while a profiling session is active.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profile_step(func.__qualname__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def profiling(report: list, trace_memory: bool = True):
+    """
+    Collect the steps measured inside the block into the report.
+
+    Args:
+        report (list): list where the measurement of the steps is appended
+        trace_memory (bool): trace the allocations of the steps with tracemalloc, which slows
+            the allocation heavy steps, otherwise only the resident memory is measured
+    """
+    _sessions.append((report, trace_memory))
+    try:
+        yield report
+    finally:
+        del _sessions[next(position for position, (session, _) in enumerate(_sessions) if session is report)]
+
+
+@contextmanager
+def profile_from_env(name: str):
+    """
+    Profile the block when the CHURN_PROFILE_DIR environment variable is set and save
+    the report in that directory, used by the DVC stages.
+    """
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    if not profile_dir:
+        yield
+        return
+    report = []
+    try:
+        with profiling(report), track_step(name):
+            yield
+    finally:
+        save_profile_report(Path(profile_dir) / f"{name.lower().replace(' ', '_')}.json", report)
+
+
+def save_profile_report(path: Path, report: list, **metadata):
+    """
+    Save the measured steps in json along with the metadata of the run.
+    """
+    os.makedirs(Path(path).parent, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({**metadata, "steps": report}, f, indent=4)
+    logger.info(f"Profile report saved at: {path}")
@@ -0,0 +1,29 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def project_dir(tmp_path, monkeypatch):
+    """
+    Run the test in a copy of the project configuration, the artifacts are created in the temporary directory.
+    """
+    shutil.copytree(REPO_ROOT / "config", tmp_path / "config")
+    for name in ("schema.yaml", "params.yaml"):
+        shutil.copy(REPO_ROOT / name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+
+    from customer_churn_prediction.pipeline import stage_06_prediction
+
+    for function in (stage_06_prediction.get_predictor_registry, stage_06_prediction.get_prediction_cache,
+                     stage_06_prediction.get_micro_batcher):
+        function.cache_clear()
+    yield tmp_path
+    if stage_06_prediction.get_predictor_registry.cache_info().currsize:
+        stage_06_prediction.get_predictor_registry().stop_watcher()
+    for function in (stage_06_prediction.get_predictor_registry, stage_06_prediction.get_prediction_cache,
+                     stage_06_prediction.get_micro_batcher):
+        function.cache_clear()
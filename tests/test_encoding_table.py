@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from customer_churn_prediction.components.encoding_table import EncodingTable
+
+
+def test_categories_keep_their_type_through_save_and_load(tmp_path):
+    table = EncodingTable({"SeniorCitizen": [0, 1], "Contract": ["Month-to-month", "One year", "Two year"]})
+    table.save(tmp_path / "encoding_table.json")
+
+    loaded = EncodingTable.load(tmp_path / "encoding_table.json")
+
+    assert loaded.columns == table.columns
+    assert loaded.fingerprint == table.fingerprint
+    encoded, _ = loaded.transform(pd.DataFrame({"SeniorCitizen": [1, 0], "Contract": ["Two year", "One year"]}))
+    assert encoded.to_numpy().tolist() == [[1, 2], [0, 1]]
+
+
+def test_tables_of_format_version_1_are_loaded(tmp_path):
+    path = tmp_path / "encoding_table.json"
+    path.write_text(json.dumps({"format_version": 1, "columns": {"Churn": {"No": 0, "Yes": 1}}}))
+
+    assert EncodingTable.load(path).columns == {"Churn": ["No", "Yes"]}
+
+
+def test_decode_refuses_the_codes_of_no_category():
+    table = EncodingTable({"Churn": ["No", "Yes"]})
+
+    assert table.decode("Churn", [1, 0]).tolist() == ["Yes", "No"]
+    with pytest.raises(ValueError, match=r"\[-1\]"):
+        table.decode("Churn", np.array([0, -1]))
+    with pytest.raises(ValueError, match=r"\[2\]"):
+        table.decode("Churn", [2])
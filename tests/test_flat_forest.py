@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from customer_churn_prediction.components.flat_forest import FlatForest
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(1000, 6))
+    target = (features[:, 0] + features[:, 1] > 0).astype(int)
+    missing = features.copy()
+    missing[rng.random(features.shape) < 0.2] = np.nan
+    return features, missing, target
+
+
+@pytest.mark.parametrize("trained_with_missing", [False, True])
+def test_random_forest_parity_with_missing_values(data, trained_with_missing):
+    from sklearn.ensemble import RandomForestClassifier
+
+    features, missing, target = data
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0)
+    model.fit(missing if trained_with_missing else features, target)
+
+    flat = FlatForest.from_model(model)
+
+    assert np.array_equal(flat.predict_proba(missing), model.predict_proba(missing))
+    assert np.array_equal(flat.predict(missing), model.predict(missing))
+
+
+def test_xgboost_parity_with_missing_values(data):
+    xgboost = pytest.importorskip("xgboost")
+
+    _, missing, target = data
+    model = xgboost.XGBClassifier(n_estimators=20, max_depth=4).fit(missing, target)
+
+    flat = FlatForest.from_model(model)
+
+    assert np.array_equal(flat.predict_proba(missing), model.predict_proba(missing))
+    assert np.array_equal(flat.predict(missing), model.predict(missing))
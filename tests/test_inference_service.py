@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from customer_churn_prediction.components.prediction_cache import PredictionCache
+from customer_churn_prediction.components.predictor_registry import PredictorRegistry
+from customer_churn_prediction.config.configuration import ConfigurationManager
+from customer_churn_prediction.entity.config_entity import PredictionCacheConfig
+from customer_churn_prediction.pipeline.stage_06_prediction import get_prediction_cache
+from customer_churn_prediction.serving.inference_service import InferenceService
+
+
+@pytest.fixture
+def service_factory(project_dir):
+    config = ConfigurationManager()
+    services = []
+
+    def create(**kwargs):
+        service = InferenceService(config.get_inference_service_config(), **kwargs)
+        services.append(service)
+        return service
+
+    yield create, PredictorRegistry(config.get_prediction_config())
+    for service in services:
+        service.executor.shutdown(wait=True)
+
+
+def test_registry_without_cache_uses_process_cache(service_factory):
+    create, registry = service_factory
+    service = create(registry=registry)
+    assert service.cache is not None
+    assert service.cache is get_prediction_cache()
+
+
+def test_explicit_cache_is_used(service_factory):
+    create, registry = service_factory
+    cache = PredictionCache(PredictionCacheConfig(enabled=True, max_entries=10, ttl_s=60, max_batch_records=64))
+    assert create(registry=registry, cache=cache).cache is cache
+    assert create(cache=cache).cache is cache
@@ -0,0 +1,14 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from customer_churn_prediction.components.model_prediction import ModelPrediction
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_batch_is_rejected_when_the_chunk_size_is_not_positive(chunk_size):
+    model_prediction = ModelPrediction.__new__(ModelPrediction)
+    model_prediction.config = SimpleNamespace(batch_chunk_size=10000)
+    with pytest.raises(ValueError, match="Chunk size"):
+        model_prediction.predict_batch(pd.DataFrame({"tenure": [1]}), chunk_size=chunk_size)
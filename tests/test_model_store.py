@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from customer_churn_prediction.components.model_store import _dump_skops, _load_skops
+
+sio = pytest.importorskip("skops.io")
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(200, 4))
+    return features, (features[:, 0] > 0).astype(int)
+
+
+def test_skops_loads_the_trained_models(tmp_path, data):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    features, target = data
+    for model in (LogisticRegression().fit(features, target),
+                  RandomForestClassifier(n_estimators=5, random_state=0).fit(features, target)):
+        path = tmp_path / f"{type(model).__name__}.skops"
+        _dump_skops(model, path)
+        assert np.array_equal(_load_skops(path).predict_proba(features), model.predict_proba(features))
+
+
+def test_skops_refuses_the_types_which_are_not_allowed(tmp_path):
+    from sklearn.preprocessing import FunctionTransformer
+
+    path = tmp_path / "model.skops"
+    _dump_skops(FunctionTransformer(func=exec), path)
+    with pytest.raises(ValueError, match="builtins.exec"):
+        _load_skops(path)
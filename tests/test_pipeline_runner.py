@@ -0,0 +1,32 @@
+import pytest
+
+from customer_churn_prediction.pipeline.pipeline_runner import PipelineRunner
+
+
+@pytest.fixture
+def runner(project_dir):
+    return PipelineRunner()
+
+
+def test_stage_is_skipped_when_inputs_and_outputs_are_unchanged(runner, project_dir):
+    output = project_dir / "output.csv"
+    output.write_text("a,b\n1,2\n")
+    runner.run_stage("Stage", lambda: None, values={"a": 1}, outputs=[output])
+    assert runner.is_unchanged("Stage", runner.inputs_hash((), {"a": 1}), [output])
+
+
+def test_missing_output_counts_as_changed(runner, project_dir):
+    output = project_dir / "output.csv"
+    output.write_text("a,b\n1,2\n")
+    runner.run_stage("Stage", lambda: None, values={"a": 1}, outputs=[output])
+    inputs_hash = runner.inputs_hash((), {"a": 1})
+    assert not runner.is_unchanged("Stage", inputs_hash, [project_dir / "output.parquet"])
+    output.unlink()
+    assert not runner.is_unchanged("Stage", inputs_hash, [output])
+
+
+def test_failed_data_validation_stops_the_transformation(runner, project_dir):
+    status_file = project_dir / "status.txt"
+    status_file.write_text("Validation status: False")
+    with pytest.raises(Exception, match="not validated"):
+        runner.transform_data(runner.config.get_data_transformation_config(), status_file)
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from customer_churn_prediction.components.decision_engine import DecisionEngine
+from customer_churn_prediction.components.model_prediction import ModelPrediction
+from customer_churn_prediction.components.prediction_cache import PredictionCache
+from customer_churn_prediction.entity.config_entity import PredictionCacheConfig
+
+
+class CountingModel:
+    def __init__(self):
+        self.records = 0
+
+    def predict_proba(self, data):
+        self.records += len(data)
+        positive = data["tenure"].to_numpy(dtype=float) / 100
+        return np.column_stack([1 - positive, positive])
+
+
+def make_prediction(max_entries=100):
+    cache = PredictionCache(PredictionCacheConfig(enabled=True, max_entries=max_entries, ttl_s=60, max_batch_records=64))
+    model_prediction = ModelPrediction.__new__(ModelPrediction)
+    model_prediction.cache = cache
+    artifacts = SimpleNamespace(
+        model=CountingModel(), decision_engine=DecisionEngine(0.5),
+        versions={"model_version": "m1", "encoder_version": "e1"})
+    return model_prediction, artifacts, cache
+
+
+def test_cached_records_are_not_predicted_again():
+    model_prediction, artifacts, cache = make_prediction()
+    records = pd.DataFrame({"tenure": [10, 60, 30], "Contract": [0, 1, 2]})
+    first = model_prediction.decide(artifacts, records, use_cache=True)
+    second = model_prediction.decide(artifacts, records.iloc[[2, 0, 1]], use_cache=True)
+    assert artifacts.model.records == 3
+    np.testing.assert_array_equal(second[1], first[1][[2, 0, 1]])
+    np.testing.assert_array_equal(second[0], [0, 0, 1])
+    assert cache.stats()["hits"] == 3
+
+
+def test_decide_without_use_cache_does_not_touch_the_cache():
+    model_prediction, artifacts, cache = make_prediction(max_entries=2)
+    small = pd.DataFrame({"tenure": [10, 60], "Contract": [0, 1]})
+    model_prediction.decide(artifacts, small, use_cache=True)
+    large = pd.DataFrame({"tenure": np.arange(100), "Contract": np.zeros(100, dtype=int)})
+    model_prediction.decide(artifacts, large)
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 0
+    assert stats["hits"] + stats["misses"] == 2
+
+
+def test_versions_are_part_of_the_key():
+    model_prediction, artifacts, cache = make_prediction()
+    records = pd.DataFrame({"tenure": [10], "Contract": [0]})
+    model_prediction.decide(artifacts, records, use_cache=True)
+    artifacts.versions = {"model_version": "m2", "encoder_version": "e1"}
+    model_prediction.decide(artifacts, records, use_cache=True)
+    assert artifacts.model.records == 2
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from customer_churn_prediction.components.encoding_table import EncodingTable
+from customer_churn_prediction.components.predictor_registry import PredictorRegistry
+
+SCHEMA = {"gender": "object", "tenure": "int64"}
+
+
+def make_artifacts(model):
+    data = pd.DataFrame({"gender": [0, 1] * 20, "tenure": range(40)})
+    return SimpleNamespace(
+        model=model.fit(data, [0, 1] * 20), encoding_table=EncodingTable({"gender": ["Female", "Male"]}),
+        schema=SCHEMA, model_version="m1", encoder_version="e1")
+
+
+def make_registry(policy):
+    registry = PredictorRegistry.__new__(PredictorRegistry)
+    registry.config = SimpleNamespace(unseen_category_policy=policy)
+    return registry
+
+
+def test_nan_policy_is_refused_for_models_not_accepting_missing_values():
+    from sklearn.linear_model import LogisticRegression
+
+    artifacts = make_artifacts(LogisticRegression())
+    make_registry("error").check(artifacts)
+    with pytest.raises(ValueError, match="does not accept missing values"):
+        make_registry("nan").check(artifacts)
+
+
+def test_nan_policy_is_accepted_for_models_accepting_missing_values():
+    from sklearn.ensemble import RandomForestClassifier
+
+    make_registry("nan").check(make_artifacts(RandomForestClassifier(n_estimators=3, random_state=0)))
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from customer_churn_prediction.pipeline.stage_06_prediction import process_singleton
+
+
+def test_concurrent_first_calls_build_one_object():
+    built = []
+
+    @process_singleton
+    def get_object():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    barrier = threading.Barrier(16)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(get_object())
+
+    threads = [threading.Thread(target=call) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(result is built[0] for result in results)